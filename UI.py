@@ -2,9 +2,92 @@
 UI components for the game
 """
 import pygame
+from collections import OrderedDict
 from config import *
 
 
+# Shared fonts, keyed by (name, size)
+fonts = {}
+
+
+def get_font(size, name=None):
+    """Get a shared font so every screen reuses the same Font objects"""
+    key = (name, size)
+    if key not in fonts:
+        fonts[key] = pygame.font.Font(name, size)
+    return fonts[key]
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces, plus digit strips for fast-changing numbers"""
+
+    DIGITS = '0123456789-'
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (font, text, color, antialias) -> surface
+        self.digit_strips = {}  # (font, color, antialias) -> (strip surface, {char: area rect})
+
+    def render(self, font, text, color, antialias=True):
+        """Render text once and reuse the surface while it stays in the cache"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def digit_strip(self, font, color, antialias=True):
+        """Render the digits once into a single strip and remember each glyph's area"""
+        key = (font, tuple(color), antialias)
+        if key not in self.digit_strips:
+            glyphs = [font.render(char, antialias, color) for char in self.DIGITS]
+            strip = pygame.Surface((sum(g.get_width() for g in glyphs), font.get_height()), pygame.SRCALPHA)
+            areas = {}
+            x = 0
+            for char, glyph in zip(self.DIGITS, glyphs):
+                # RGBA_MAX onto the cleared strip copies the glyph exactly
+                strip.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                areas[char] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+                x += glyph.get_width()
+            self.digit_strips[key] = (strip, areas)
+        return self.digit_strips[key]
+
+    def draw_number(self, surface, font, label, number, color, pos, antialias=True):
+        """Draw a cached label followed by a number built from digit glyphs.
+
+        Returns the rect covered, so changing scores never re-render whole strings.
+        """
+        x, y = pos
+        label_surface = self.render(font, label, color, antialias)
+        surface.blit(label_surface, (x, y))
+        x += label_surface.get_width()
+
+        strip, areas = self.digit_strip(font, color, antialias)
+        sequence = []
+        for char in str(number):
+            area = areas[char]
+            sequence.append((strip, (x, y), area))
+            x += area.width
+        surface.blits(sequence, doreturn=False)
+
+        return pygame.Rect(pos[0], y, x - pos[0], max(label_surface.get_height(), strip.get_height()))
+
+
+# Shared text cache used by the game screens and UI widgets
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache"""
+    return text_cache.render(font, text, color, antialias)
+
+
 class Button:
     """Simple button class"""
     def __init__(self, x, y, width, height, text, color=BLUE):
@@ -20,7 +103,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect)
         pygame.draw.rect(surface, WHITE, self.rect, 2)
 
-        text_surface = font.render(self.text, True, WHITE)
+        text_surface = render_text(font, self.text, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -82,7 +165,7 @@ class InputBox:
             display_text = self.text if self.text else self.placeholder
 
         text_color = WHITE if self.text else GRAY
-        text_surface = font.render(display_text, True, text_color)
+        text_surface = render_text(font, display_text, text_color)
         surface.blit(text_surface, (self.rect.x + 5, self.rect.y + 5))
 
 
@@ -115,6 +198,6 @@ class MessageBox:
     def draw(self, surface, font):
         """Draw the message"""
         if self.visible and self.message:
-            text_surface = font.render(self.message, True, self.color)
+            text_surface = render_text(font, self.message, self.color)
             text_rect = text_surface.get_rect(center=self.rect.center)
             surface.blit(text_surface, text_rect)
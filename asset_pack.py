@@ -0,0 +1,192 @@
+"""
+Baked asset pack: pre-decoded pixel buffers stored in one memory-mapped file
+
+Run `python asset_pack.py` to bake every asset the AssetManager knows about.
+At runtime the pack replaces PNG decoding; it is ignored if any source file
+is newer than the pack.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+from config import *
+
+PACK_MAGIC = b'APAK'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sII')  # magic, version, index length
+PIXEL_FORMAT = 'BGRA' if sys.byteorder == 'little' else 'ARGB'  # Matches convert_alpha()
+ALIGNMENT = 16
+
+
+def default_pack_path():
+    """Location of the baked pack inside the assets folder"""
+    return os.path.join(os.path.dirname(__file__), 'assets', ASSET_PACK_NAME)
+
+
+def decode_to_bytes(filepath):
+    """Decode an image in a worker process and return its size and RGBA pixels"""
+    try:
+        image = pygame.image.load(filepath)
+    except pygame.error as e:
+        print(f"Could not bake {os.path.basename(filepath)}: {e}")
+        return None
+    return image.get_size(), pygame.image.tobytes(image, 'RGBA')
+
+
+class AssetPack:
+    """Read-only view of a baked pack file"""
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        with open(pack_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_length = HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{pack_path} is not a version {PACK_VERSION} asset pack")
+
+        index = json.loads(self.data[HEADER.size:HEADER.size + index_length])
+        self.pixel_format = index['pixel_format']
+        self.entries = index['entries']
+        self.sources = index['sources']
+        self.view = memoryview(self.data)[data_start(index_length):]
+
+    @classmethod
+    def open(cls, pack_path=None):
+        """Open the pack if it exists and is up to date, otherwise return None"""
+        pack_path = pack_path or default_pack_path()
+        if not os.path.exists(pack_path):
+            return None
+
+        try:
+            pack = cls(pack_path)
+        except (OSError, ValueError) as e:
+            print(f"Could not open asset pack: {e}")
+            return None
+
+        if pack.is_stale():
+            print("Asset pack is older than its source files. Loading PNGs instead.")
+            return None
+        return pack
+
+    def is_stale(self):
+        """True if any source file or folder changed after the pack was written"""
+        pack_mtime = os.path.getmtime(self.pack_path)
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for source in self.sources:
+            path = os.path.join(base_dir, source)
+            if not os.path.exists(path) or os.path.getmtime(path) > pack_mtime:
+                return True
+        return False
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def load(self, key):
+        """Build surfaces for a baked entry straight from the mapped buffers"""
+        entry = self.entries[key]
+        frames = []
+        for offset, width, height in entry['frames']:
+            buffer = self.view[offset:offset + width * height * 4]
+            surface = pygame.image.frombuffer(buffer, (width, height), self.pixel_format)
+            if not entry['alpha']:
+                # Opaque images (scaled backgrounds) blit faster without an alpha channel
+                surface = surface.convert()
+            frames.append(surface)
+        return frames if entry['is_list'] else frames[0]
+
+
+def data_start(index_length):
+    """Offset of the pixel data section, aligned after the header and index"""
+    start = HEADER.size + index_length
+    return start + (-start % ALIGNMENT)
+
+
+def write_pack(pack_path, entries, sources):
+    """Write baked entries ({key: (surfaces, is_list)}) to a pack file"""
+    index = {'pixel_format': PIXEL_FORMAT, 'entries': {}, 'sources': sources}
+    blobs = []
+    offset = 0  # Relative to the start of the pixel data section
+
+    for key, (value, is_list) in entries.items():
+        surfaces = value if is_list else [value]
+        frames = []
+        for surface in surfaces:
+            blob = pygame.image.tobytes(surface, PIXEL_FORMAT)
+            frames.append([offset, surface.get_width(), surface.get_height()])
+            padding = -len(blob) % ALIGNMENT
+            blobs.append(blob + b'\0' * padding)
+            offset += len(blob) + padding
+        index['entries'][key] = {
+            'frames': frames,
+            'is_list': is_list,
+            'alpha': bool(surfaces[0].get_flags() & pygame.SRCALPHA)
+        }
+
+    index_bytes = json.dumps(index).encode()
+    tmp_path = pack_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        f.write(b'\0' * (data_start(len(index_bytes)) - HEADER.size - len(index_bytes)))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, pack_path)
+
+
+def bake(pack_path=None, workers=None):
+    """Decode every registered asset with a process pool and write the pack"""
+    from assets import AssetManager
+
+    start = time.perf_counter()
+    pack_path = pack_path or default_pack_path()
+
+    # Converting surfaces needs a display mode, even a hidden one
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    manager = AssetManager(use_pack=False)
+    keys = [key for key in manager.loaders if manager.source_files(key)]
+    paths = list(dict.fromkeys(path for key in keys for path in manager.source_files(key)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        decoded = dict(zip(paths, pool.map(decode_to_bytes, paths)))
+
+    # Run the normal loaders (slicing, scaling, converting) on the decoded pixels
+    manager.prefetched = {path: pygame.image.frombuffer(result[1], result[0], 'RGBA')
+                          for path, result in decoded.items() if result}
+    entries = {}
+    for key in keys:
+        value = manager.load(key)
+        if value is not None:
+            entries[key] = (value, isinstance(value, list))
+    manager.prefetched = {}
+
+    # Watch the source files and their folders (new frames change the folder mtime)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = sorted(os.path.relpath(path, base_dir)
+                     for path in set(paths) | {os.path.dirname(path) for path in paths} | {MANIFEST_PATH})
+    write_pack(pack_path, entries, sources)
+
+    elapsed = time.perf_counter() - start
+    print(f"Baked {len(entries)} assets ({len(paths)} files) into {pack_path} in {elapsed:.2f}s")
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake game assets into a memory-mapped pack file")
+    parser.add_argument('-o', '--output', help="pack file path (default: assets/%s)" % ASSET_PACK_NAME)
+    parser.add_argument('-j', '--workers', type=int, help="number of worker processes")
+    args = parser.parse_args()
+    bake(args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Asset usage report: cross-references the manifest with the code and TMX maps
+
+Run `python asset_report.py` to list manifest entries no code asks for,
+manifest files that are missing, and image files under assets/ that neither
+the manifest nor any level map references.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from config import *
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def manifest_files(entry):
+    """Files under assets/ that a manifest entry reads"""
+    if 'folder' in entry:
+        return [os.path.join(entry['folder'], f) for f in entry['frames']]
+    return [entry.get('sheet') or entry['image']]
+
+
+def code_string_literals():
+    """All quoted strings in the game's Python modules"""
+    literals = set()
+    for path in glob.glob(os.path.join(PROJECT_DIR, '*.py')):
+        with open(path, encoding='utf-8') as f:
+            literals.update(re.findall(r"""['"]([\w\-. ]+)['"]""", f.read()))
+    return literals
+
+
+def map_image_files(map_path, seen=None):
+    """Image files referenced by a TMX map and the external tilesets it uses"""
+    seen = seen if seen is not None else set()
+    map_path = os.path.normpath(map_path)
+    if map_path in seen or not os.path.exists(map_path):
+        return set()
+    seen.add(map_path)
+
+    images = set()
+    base_dir = os.path.dirname(map_path)
+    root = ET.parse(map_path).getroot()
+    for element in root.iter():
+        source = element.get('source')
+        if not source:
+            continue
+        path = os.path.normpath(os.path.join(base_dir, source))
+        if element.tag == 'image':
+            images.add(path)
+        elif element.tag == 'tileset':
+            images |= map_image_files(path, seen)
+    return images
+
+
+def build_report():
+    """Collect unused manifest entries, missing files and unreferenced images"""
+    with open(MANIFEST_PATH) as f:
+        manifest = json.load(f)
+
+    # Manifest entries the code never asks for (backgrounds are requested as level<N>)
+    literals = code_string_literals()
+    level_names = {f'level{n}' for n in range(1, NUM_LEVELS + 1)}
+    unused_entries = [name for name in manifest.get('sprites', {}) if name not in literals]
+    unused_entries += [name for name in manifest.get('backgrounds', {}) if name not in level_names]
+
+    referenced = set()
+    for section in ('sprites', 'backgrounds'):
+        for entry in manifest.get(section, {}).values():
+            referenced.update(os.path.normpath(os.path.join(ASSETS_DIR, f)) for f in manifest_files(entry))
+    missing = sorted(path for path in referenced if not os.path.exists(path))
+
+    # Only the maps the game actually loads count (see load_level_from_tiled)
+    for n in range(1, NUM_LEVELS + 1):
+        referenced |= map_image_files(os.path.join(ASSETS_DIR, 'levels', f'level{n}.tmx'))
+
+    unused_files = []
+    total_images = 0
+    for dirpath, _, filenames in os.walk(ASSETS_DIR):
+        for filename in filenames:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                total_images += 1
+                path = os.path.normpath(os.path.join(dirpath, filename))
+                if path not in referenced:
+                    unused_files.append(path)
+
+    return {
+        'unused_entries': unused_entries,
+        'missing_files': missing,
+        'unused_files': sorted(unused_files),
+        'total_images': total_images
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report unused and missing game assets")
+    parser.add_argument('--list', action='store_true', help="print every unreferenced image file")
+    args = parser.parse_args()
+
+    report = build_report()
+
+    for name in report['unused_entries']:
+        print(f"Manifest entry not used by the code: {name}")
+    for path in report['missing_files']:
+        print(f"Missing file referenced by the manifest: {os.path.relpath(path, ASSETS_DIR)}")
+
+    unused_files = report['unused_files']
+    if args.list:
+        for path in unused_files:
+            print(f"Unreferenced: {os.path.relpath(path, ASSETS_DIR)}")
+
+    unused_bytes = sum(os.path.getsize(path) for path in unused_files)
+    print(f"{len(unused_files)} of {report['total_images']} image files under assets/ are never referenced "
+          f"({unused_bytes / (1024 * 1024):.1f} MB)")
+
+    return 1 if report['missing_files'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
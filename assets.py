@@ -3,229 +3,329 @@ Asset loading and management
 """
 import pygame
 import os
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from config import *
+from asset_pack import AssetPack
+
+
+def decode_image(filepath):
+    """Read and decode an image file without converting it (safe on worker threads)"""
+    try:
+        return pygame.image.load(filepath)
+    except pygame.error:
+        # The serial path reloads it on the main thread and reports the error
+        return None
+
+
+def create_placeholder(size, color):
+    """Create a solid colored rectangle used when an asset is missing"""
+    surf = pygame.Surface(size)
+    surf.fill(color)
+    return surf
+
+
+class TextureAtlas:
+    """Packs many small frames into a few large surfaces (shelf packing)"""
+
+    def __init__(self, page_size=ATLAS_PAGE_SIZE, padding=1):
+        self.page_size = page_size
+        self.padding = padding
+        self.pages = []
+        self.page = None  # Page currently being filled
+        self.live = {}  # id(page) -> regions allocated on it and not yet released
+        # Shelf cursor on the current page
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+
+    def new_page(self):
+        """Start a new transparent atlas page"""
+        self.page = pygame.Surface((self.page_size, self.page_size), pygame.SRCALPHA)
+        self.pages.append(self.page)
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+        return self.page
+
+    def allocate(self, width, height):
+        """Reserve a width x height region and return it as a subsurface of a page"""
+        if width > self.page_size or height > self.page_size:
+            # Oversized frame: give it a dedicated page and keep packing the current one
+            page = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.pages.append(page)
+            self.live[id(page)] = 1
+            return page.subsurface((0, 0, width, height))
+
+        if self.page is None:
+            self.new_page()
+
+        # Move to the next shelf if the frame doesn't fit on this row
+        if self.shelf_x + width > self.page_size:
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_height + self.padding
+            self.shelf_height = 0
+
+        # Open a new page if the frame doesn't fit below the last shelf
+        if self.shelf_y + height > self.page_size:
+            self.new_page()
+
+        region = self.page.subsurface((self.shelf_x, self.shelf_y, width, height))
+        self.shelf_x += width + self.padding
+        self.shelf_height = max(self.shelf_height, height)
+        self.live[id(self.page)] = self.live.get(id(self.page), 0) + 1
+        return region
+
+    def release(self, regions):
+        """Give back regions that are no longer cached. A page with no live regions
+        left is dropped (sprites still holding its frames keep it alive until they go)
+        and is never packed into again."""
+        for region in regions:
+            page = region.get_parent()
+            if page is None or id(page) not in self.live:
+                continue
+            self.live[id(page)] -= 1
+            if self.live[id(page)] == 0:
+                del self.live[id(page)]
+                self.pages = [other for other in self.pages if other is not page]
+                if page is self.page:
+                    self.page = None
+
+    def page_bytes(self):
+        """Pixel memory of the pages still in use"""
+        return sum(page.get_width() * page.get_height() * page.get_bytesize() for page in self.pages)
+
+    def add(self, surface):
+        """Copy a surface into the atlas and return the subsurface holding it"""
+        region = self.allocate(surface.get_width(), surface.get_height())
+        # RGBA_MAX onto the cleared region copies pixels exactly (no alpha blending)
+        region.blit(surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        return region
+
+    def add_frames(self, frames):
+        """Pack a list of frames, tallest first for tighter shelves, keeping their order"""
+        packed = [None] * len(frames)
+        order = sorted(range(len(frames)), key=lambda i: frames[i].get_height(), reverse=True)
+        for i in order:
+            packed[i] = self.add(frames[i])
+        return packed
+
+
+def blit_batched(target, sprites):
+    """Draw (image, position) pairs with a single Surface.blits call.
+
+    Images that live in a texture atlas are drawn straight from their atlas page
+    using a source rect, so every visible sprite goes through one batched call.
+    Returns the rects that were drawn.
+    """
+    sequence = []
+    for image, position in sprites:
+        page = image.get_parent()
+        if page is not None:
+            offset_x, offset_y = image.get_offset()
+            area = (offset_x, offset_y, image.get_width(), image.get_height())
+            sequence.append((page, position, area))
+        else:
+            sequence.append((image, position))
+
+    if not sequence:
+        return []
+    return target.blits(sequence)
+
+
+class AssetCache:
+    """LRU cache of decoded surfaces bounded by a byte budget"""
+
+    def __init__(self, budget_bytes=ASSET_CACHE_BUDGET, on_evict=None):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # key -> decoded surface or list of frames
+        self.sizes = {}
+        self.pinned = set()
+        self.total_bytes = 0
+        self.on_evict = on_evict  # Called as on_evict(key, value) for each evicted entry
+
+    @staticmethod
+    def surface_bytes(value):
+        """Approximate pixel memory used by a surface or list of surfaces"""
+        surfaces = value if isinstance(value, list) else [value]
+        return sum(surf.get_width() * surf.get_height() * surf.get_bytesize() for surf in surfaces)
+
+    def get(self, key):
+        """Return a cached value (marking it recently used) or None"""
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Store a decoded value and evict old entries if over budget"""
+        if key in self.entries:
+            self.total_bytes -= self.sizes[key]
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.sizes[key] = self.surface_bytes(value)
+        self.total_bytes += self.sizes[key]
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used, unpinned entries until within budget"""
+        for key in list(self.entries):
+            if self.total_bytes <= self.budget_bytes:
+                break
+            if key in self.pinned:
+                continue
+            value = self.entries.pop(key)
+            self.total_bytes -= self.sizes.pop(key)
+            if self.on_evict:
+                self.on_evict(key, value)
+
+    def pin(self, keys):
+        """Replace the pinned working set; pinned entries are never evicted"""
+        self.pinned = set(keys)
+        self.evict()
 
 
 class AssetManager:
-    """Manages loading and caching of game assets"""
-
-    def __init__(self):
-        self.sprites = {}
-        self.backgrounds = {}
+    """Manages loading and caching of game assets
+
+    Assets are registered as loaders at startup and only decoded on first use.
+    Decoded surfaces and prepared (scaled/flipped) frames share an LRU cache
+    with a byte budget; atlas pages are dropped once none of their frames are cached.
+    """
+
+    def __init__(self, budget_bytes=ASSET_CACHE_BUDGET, use_pack=True):
+        self.loaders = {}             # cache key -> (loader, args)
+        self.sprite_keys = {}         # sprite name -> cache key
+        self.background_keys = {}     # level name -> cache key
+        self.failed = set()           # cache keys whose loader returned nothing
+        self.cache = AssetCache(budget_bytes, on_evict=self.on_evict)
+        self.default_sizes = {}       # sprite name -> default scale from the manifest
+        self.atlas = TextureAtlas()
+        self.lock = threading.RLock()     # Levels may be built on a worker thread
+        self.local = threading.local()    # Per-thread working set being recorded
+        self.prefetched = {}   # file path -> decoded, unconverted surface (during preload)
+        self.pack = AssetPack.open() if use_pack else None  # Baked pixels, if up to date
         self.load_assets()
 
     def load_assets(self):
-        """Load all game assets"""
-        # Check if assets directory exists
-        assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-
-        if not os.path.exists(assets_dir):
-            print("Assets directory not found. Using colored rectangles.")
-            self.create_placeholder_assets()
-            return
-
-        # Try to load sprite images
-        self.load_sprites()
-
-        # Try to load background images
-        self.load_backgrounds()
+        """Register all game assets from the manifest (nothing is decoded until requested)"""
+        try:
+            with open(MANIFEST_PATH) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read asset manifest ({e}). Using colored rectangles.")
+            manifest = {}
+
+        for name, entry in manifest.get('sprites', {}).items():
+            self.register_sprite(name, *self.manifest_loader(entry))
+            if entry.get('scale') and 'image' not in entry:
+                # Animations are scaled by get_frames; single images are loaded pre-scaled
+                self.default_sizes[name] = tuple(entry['scale'])
+
+        for level_name, entry in manifest.get('backgrounds', {}).items():
+            self.register_background(level_name, entry['image'], *self.manifest_loader(entry))
 
         # Create placeholders for missing assets
         self.create_placeholder_assets()
 
-    def load_sprites(self):
-        """Load sprite images and animations"""
-        sprites_dir = os.path.join(os.path.dirname(__file__), 'assets', 'sprites')
-
-        if not os.path.exists(sprites_dir):
-            return
-
-        # Try to load animation folders first
-        self.load_player_animations(sprites_dir)
-        self.load_enemy_animations(sprites_dir)
-        self.load_coin_animations(sprites_dir)
-        self.load_chest_animations(sprites_dir)
-
-        # Load single sprite files
-        sprite_files = {
-            'player': 'player.png',
-            'enemy': 'enemy.png',
-            'coin': 'coin.png',
-            'platform': 'platform.png',
-            'boss': 'boss.png'
-        }
-
-        for name, filename in sprite_files.items():
-            filepath = os.path.join(sprites_dir, filename)
-            if os.path.exists(filepath):
-                try:
-                    self.sprites[name] = pygame.image.load(filepath).convert_alpha()
-                    print(f"Loaded sprite: {name}")
-                except pygame.error as e:
-                    print(f"Could not load {filename}: {e}")
-
-    def load_player_animations(self, sprites_dir):
-        """Load player animation frames from folders"""
-        animation_folders = {
-            'player_idle': 'Captain Clown Nose without Sword/01-Idle',
-            'player_walk': 'Captain Clown Nose without Sword/02-Run',
-            'player_jump': 'Captain Clown Nose without Sword/03-Jump'
-        }
-
-        for anim_name, folder_name in animation_folders.items():
-            folder_path = os.path.join(sprites_dir, folder_name)
-            if os.path.exists(folder_path):
-                frames = []
-                # Load all PNG files in the folder, sorted
-                files = sorted([f for f in os.listdir(folder_path) if f.endswith('.png')])
-                for filename in files:
-                    filepath = os.path.join(folder_path, filename)
-                    try:
-                        frame = pygame.image.load(filepath).convert_alpha()
-                        frames.append(frame)
-                    except pygame.error as e:
-                        print(f"Could not load {filename}: {e}")
-
-                if frames:
-                    self.sprites[anim_name] = frames
-                    print(f"Loaded {len(frames)} frames for {anim_name}")
-
-    def load_enemy_animations(self, sprites_dir):
-        """Load enemy animation frames from folders"""
-        enemy_folders = {
-            'enemy_green': 'SlimeGreen',
-            'enemy_orange': 'SlimeOrange',
-            'enemy_cucumber_idle': '3-Enemy-Cucumber/1-Idle',
-            'enemy_cucumber_run': '3-Enemy-Cucumber/2-Run'
-        }
-
-        for anim_name, folder_name in enemy_folders.items():
-            folder_path = os.path.join(sprites_dir, folder_name)
-            if os.path.exists(folder_path):
-                frames = []
-                # Load all PNG files in the folder, sorted by number
-                files = sorted([f for f in os.listdir(folder_path) if f.endswith('.png')],
-                             key=lambda x: int(x.split('.')[0]) if x.split('.')[0].isdigit() else 0)
-                for filename in files:
-                    filepath = os.path.join(folder_path, filename)
-                    try:
-                        frame = pygame.image.load(filepath).convert_alpha()
-                        frames.append(frame)
-                    except pygame.error as e:
-                        print(f"Could not load {filename}: {e}")
-
-                if frames:
-                    self.sprites[anim_name] = frames
-                    print(f"Loaded {len(frames)} frames for {anim_name}")
-
-    def load_coin_animations(self, sprites_dir):
-        """Load coin animation frames from sprite sheet"""
-        diamond_path = os.path.join(sprites_dir, 'big diamond idles', 'Big Diamond Idle (18x14).png')
-
-        if os.path.exists(diamond_path):
+        print(f"Registered {len(self.sprite_keys)} sprites and {len(self.background_keys)} backgrounds"
+              + (" (using baked asset pack)" if self.pack else ""))
+
+    def manifest_loader(self, entry):
+        """Return (loader, *args) for a manifest entry: a frame folder, a sprite sheet or an image"""
+        if 'folder' in entry:
+            folder_path = os.path.join(ASSETS_DIR, entry['folder'])
+            return self.load_frame_folder, folder_path, tuple(entry['frames'])
+        if 'sheet' in entry:
+            frame_width, frame_height = entry['frame_size']
+            return (self.load_sprite_sheet, os.path.join(ASSETS_DIR, entry['sheet']),
+                    frame_width, frame_height, tuple(entry['frames']))
+        scale = tuple(entry['scale']) if entry.get('scale') else None
+        return self.load_image, os.path.join(ASSETS_DIR, entry['image']), entry.get('alpha', True), scale
+
+    def register_sprite(self, name, loader, *args):
+        """Register a sprite that will be decoded on first get_sprite call"""
+        key = f'sprite:{name}'
+        self.loaders[key] = (loader, args)
+        self.sprite_keys[name] = key
+
+    def register_background(self, level_name, source, loader, *args):
+        """Register a background; levels sharing an image share one cache key"""
+        key = f'background:{source}'
+        self.loaders[key] = (loader, args)
+        self.background_keys[level_name] = key
+
+    def read_image(self, filepath):
+        """Return a decoded image, using the preload results when available"""
+        image = self.prefetched.get(filepath)
+        if image is None:
+            image = pygame.image.load(filepath)
+        return image
+
+    def source_files(self, key):
+        """List the image files a registered loader will read"""
+        if self.pack and key in self.pack:
+            return []
+        loader, args = self.loaders[key]
+        if loader == self.load_frame_folder:
+            folder_path, files = args
+            return [os.path.join(folder_path, f) for f in files]
+        if loader in (self.load_image, self.load_sprite_sheet):
+            return [args[0]]
+        return []
+
+    def load_image(self, filepath, alpha=True, size=None):
+        """Decode a single image file, optionally scaling it"""
+        try:
+            image = self.read_image(filepath)
+        except pygame.error as e:
+            print(f"Could not load {os.path.basename(filepath)}: {e}")
+            return None
+
+        image = image.convert_alpha() if alpha else image.convert()
+        if size:
+            image = pygame.transform.scale(image, size)
+        print(f"Loaded image: {os.path.basename(filepath)} ({image.get_width()}x{image.get_height()})")
+        return image
+
+    def load_frame_folder(self, folder_path, files):
+        """Decode the listed frame files of a folder, in order"""
+        frames = []
+        for filename in files:
+            filepath = os.path.join(folder_path, filename)
             try:
-                sprite_sheet = pygame.image.load(diamond_path).convert_alpha()
-
-                # The sprite sheet has frames of 18x14 pixels arranged horizontally
-                frame_width = 18
-                frame_height = 14
-                sheet_width = sprite_sheet.get_width()
-                num_frames = sheet_width // frame_width
-
-                frames = []
-                for i in range(num_frames):
-                    # Extract each frame from the sprite sheet
-                    frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
-                    frame.blit(sprite_sheet, (0, 0), (i * frame_width, 0, frame_width, frame_height))
-                    frames.append(frame)
-
-                if frames:
-                    self.sprites['coin_diamond'] = frames
-                    print(f"Loaded {len(frames)} frames for diamond coin animation")
+                frame = self.read_image(filepath).convert_alpha()
+                frames.append(frame)
             except pygame.error as e:
-                print(f"Could not load diamond sprite sheet: {e}")
-
-    def load_chest_animations(self, sprites_dir):
-        """Load chest animation frames (idle and open)"""
-        chest_dir = os.path.join(sprites_dir, 'Chest')
-
-        if not os.path.exists(chest_dir):
-            return
-
-        # Load idle animation (closed chest)
-        idle_dir = os.path.join(chest_dir, 'Idle')
-        if os.path.exists(idle_dir):
-            frames = []
-            files = sorted([f for f in os.listdir(idle_dir) if f.endswith('.png')])
-            for filename in files:
-                filepath = os.path.join(idle_dir, filename)
-                try:
-                    frame = pygame.image.load(filepath).convert_alpha()
-                    frames.append(frame)
-                except pygame.error as e:
-                    print(f"Could not load {filename}: {e}")
-
-            if frames:
-                self.sprites['chest_idle'] = frames
-                print(f"Loaded {len(frames)} frames for chest idle animation")
-
-        # Load open/unlocked animation
-        open_dir = os.path.join(chest_dir, 'Unlocked')
-        if os.path.exists(open_dir):
-            frames = []
-            files = sorted([f for f in os.listdir(open_dir) if f.endswith('.png')])
-            for filename in files:
-                filepath = os.path.join(open_dir, filename)
-                try:
-                    frame = pygame.image.load(filepath).convert_alpha()
-                    frames.append(frame)
-                except pygame.error as e:
-                    print(f"Could not load {filename}: {e}")
-
-            if frames:
-                self.sprites['chest_open'] = frames
-                print(f"Loaded {len(frames)} frames for chest open animation")
-
-    def load_backgrounds(self):
-        """Load background images"""
-        bg_dir = os.path.join(os.path.dirname(__file__), 'assets', 'backgrounds')
-
-        if not os.path.exists(bg_dir):
-            return
-
-        # Try to load demo.png as the main background
-        demo_bg_path = os.path.join(bg_dir, 'demo.png')
-        if os.path.exists(demo_bg_path):
-            try:
-                bg = pygame.image.load(demo_bg_path).convert_alpha()
-                # DON'T scale - use original size for zoom effect
-                # The game will crop/scroll through this larger image
-                # Use this background for all levels
-                self.backgrounds['level1'] = bg
-                self.backgrounds['level2'] = bg
-                self.backgrounds['level3'] = bg
-                print(f"Loaded demo.png background (original size: {bg.get_width()}x{bg.get_height()})")
-            except pygame.error as e:
-                print(f"Could not load demo.png: {e}")
-
-        # Try to load individual level backgrounds
-        bg_files = {
-            'level1': 'level1.png',
-            'level2': 'level2.png',
-            'level3': 'level3.png'
-        }
-
-        for name, filename in bg_files.items():
-            filepath = os.path.join(bg_dir, filename)
-            if os.path.exists(filepath):
-                try:
-                    bg = pygame.image.load(filepath).convert()
-                    # Scale to screen size
-                    bg = pygame.transform.scale(bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
-                    self.backgrounds[name] = bg
-                    print(f"Loaded background: {name}")
-                except pygame.error as e:
-                    print(f"Could not load {filename}: {e}")
+                print(f"Could not load {filename}: {e}")
+
+        if frames:
+            print(f"Loaded {len(frames)} frames from {os.path.basename(folder_path)}")
+            return frames
+        return None
+
+    def load_sprite_sheet(self, filepath, frame_width, frame_height, frame_indices):
+        """Decode a horizontal sprite sheet and slice out the listed frames"""
+        try:
+            sprite_sheet = self.read_image(filepath).convert_alpha()
+        except pygame.error as e:
+            print(f"Could not load sprite sheet {os.path.basename(filepath)}: {e}")
+            return None
+
+        frames = []
+        for i in frame_indices:
+            # Extract each frame from the sprite sheet
+            frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
+            frame.blit(sprite_sheet, (0, 0), (i * frame_width, 0, frame_width, frame_height))
+            frames.append(frame)
+
+        if frames:
+            print(f"Loaded {len(frames)} frames from {os.path.basename(filepath)}")
+            return frames
+        return None
 
     def create_tiled_background(self, tile_image, width, height):
         """Create a tiled background surface from a tile image (like Godot)"""
@@ -241,57 +341,160 @@ class AssetManager:
         return surface
 
     def create_placeholder_assets(self):
-        """Create colored rectangles as placeholders for missing assets"""
-        # Player placeholder
-        if 'player' not in self.sprites:
-            surf = pygame.Surface((PLAYER_WIDTH, PLAYER_HEIGHT))
-            surf.fill(BLUE)
-            self.sprites['player'] = surf
-
-        # Enemy placeholder
-        if 'enemy' not in self.sprites:
-            surf = pygame.Surface((ENEMY_WIDTH, ENEMY_HEIGHT))
-            surf.fill(RED)
-            self.sprites['enemy'] = surf
-
-        # Coin placeholder
-        if 'coin' not in self.sprites:
-            surf = pygame.Surface((20, 20))
-            surf.fill(YELLOW)
-            self.sprites['coin'] = surf
-
-        # Platform placeholder
-        if 'platform' not in self.sprites:
-            surf = pygame.Surface((100, PLATFORM_HEIGHT))
-            surf.fill(GRAY)
-            self.sprites['platform'] = surf
-
-        # Boss placeholder
-        if 'boss' not in self.sprites:
-            surf = pygame.Surface((BOSS_WIDTH, BOSS_HEIGHT))
-            surf.fill((128, 0, 128))  # Purple
-            self.sprites['boss'] = surf
-
-        # Background placeholders
-        for level in ['level1', 'level2', 'level3']:
-            if level not in self.backgrounds:
-                surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                # Different colors for different levels
-                if level == 'level1':
-                    surf.fill((135, 206, 235))  # Sky blue
-                elif level == 'level2':
-                    surf.fill((100, 149, 237))  # Cornflower blue
+        """Register colored rectangles as placeholders for missing assets"""
+        placeholders = {
+            'player': ((PLAYER_WIDTH, PLAYER_HEIGHT), BLUE),
+            'enemy': ((ENEMY_WIDTH, ENEMY_HEIGHT), RED),
+            'coin': ((20, 20), YELLOW),
+            'platform': ((100, PLATFORM_HEIGHT), GRAY),
+            'boss': ((BOSS_WIDTH, BOSS_HEIGHT), (128, 0, 128))  # Purple
+        }
+
+        for name, (size, color) in placeholders.items():
+            if name not in self.sprite_keys:
+                self.register_sprite(name, create_placeholder, size, color)
+
+        # Background placeholders - different colors for different levels
+        level_colors = {
+            'level1': (135, 206, 235),  # Sky blue
+            'level2': (100, 149, 237),  # Cornflower blue
+            'level3': (70, 70, 100)     # Dark blue-gray
+        }
+
+        for level, color in level_colors.items():
+            if level not in self.background_keys:
+                self.register_background(level, f'placeholder_{level}', create_placeholder,
+                                         (SCREEN_WIDTH, SCREEN_HEIGHT), color)
+
+    def load(self, key):
+        """Return the decoded asset for a cache key, decoding it on first use"""
+        if key is None:
+            return None
+
+        self.record(key)
+        with self.lock:
+            if key in self.failed:
+                return None
+            value = self.cache.get(key)
+            if value is None:
+                if self.pack and key in self.pack:
+                    value = self.pack.load(key)
                 else:
-                    surf.fill((70, 70, 100))    # Dark blue-gray
-                self.backgrounds[level] = surf
+                    loader, args = self.loaders[key]
+                    value = loader(*args)
+                if value is None:
+                    self.failed.add(key)
+                    return None
+                self.cache.put(key, value)
+            return value
+
+    def preload(self, keys=None, workers=None):
+        """Decode registered assets up front and return the wall-clock time taken.
+
+        With workers=0 files are decoded one at a time on the calling thread.
+        Otherwise file reads and image decodes are fanned out to a thread pool
+        (workers=None picks a default from the CPU count) and only the final
+        convert/slice pass runs on the calling thread. Either way the cache ends
+        up holding the same surfaces as loading them lazily.
+        """
+        start = time.perf_counter()
+        keys = [key for key in (keys or self.loaders)
+                if key not in self.failed and self.cache.get(key) is None]
+
+        paths = []
+        if workers != 0:
+            paths = list(dict.fromkeys(path for key in keys for path in self.source_files(key)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                self.prefetched = dict(zip(paths, pool.map(decode_image, paths)))
+
+        try:
+            for key in keys:
+                self.load(key)
+        finally:
+            self.prefetched = {}
+
+        elapsed = time.perf_counter() - start
+        mode = "serial" if workers == 0 else f"parallel, {len(paths)} files"
+        print(f"Preloaded {len(keys)} assets ({mode}) in {elapsed * 1000:.1f} ms")
+        return elapsed
+
+    def record(self, key):
+        """Add a cache key to the working set this thread is recording, if any"""
+        recording = getattr(self.local, 'recording', None)
+        if recording is not None:
+            recording.add(key)
+
+    def on_evict(self, key, value):
+        """Cache eviction hook: prepared frames give their atlas regions back"""
+        if isinstance(key, tuple) and key[0] == 'frames':
+            self.atlas.release(value)
+
+    def begin_working_set(self):
+        """Start recording which assets this thread requests (e.g. while building a level)"""
+        self.local.recording = set()
+
+    def end_working_set(self):
+        """Stop recording and return the keys requested since begin_working_set"""
+        keys = getattr(self.local, 'recording', None) or set()
+        self.local.recording = None
+        return keys
+
+    def pin(self, keys, keep_pinned=False):
+        """Pin a working set (e.g. the active level's) so it is never evicted;
+        keep_pinned adds it to the current pins instead (e.g. a preloaded level's)"""
+        with self.lock:
+            self.cache.pin(set(keys) | self.cache.pinned if keep_pinned else keys)
 
     def get_sprite(self, name):
         """Get a sprite by name"""
-        return self.sprites.get(name)
+        return self.load(self.sprite_keys.get(name))
+
+    def get_frames(self, name, size=None, flipped=False):
+        """Get animation frames scaled to size and optionally mirrored horizontally.
+
+        Frames are built on the first request and the same Surface objects are
+        returned while they stay cached, so entities can index into them every tick
+        instead of scaling and flipping on the fly. Prepared frames live in the texture
+        atlas and count against the cache budget like decoded surfaces; size=None uses
+        the manifest's default scale, or the native frame size if it has none.
+        Returns None if the sprite is missing.
+        """
+        size = size or self.default_sizes.get(name)
+        key = ('frames', name, tuple(size) if size else None, flipped)
+        self.record(key)
+        with self.lock:
+            return self.build_frames(name, key)
+
+    def build_frames(self, name, key):
+        """Scale/mirror a sprite's frames into the atlas and cache them under key"""
+        _, _, size, flipped = key
+        frames = self.cache.get(key)
+        if frames is not None:
+            return frames
+
+        source = self.get_sprite(name)
+        if source is None:
+            return None
+        if not isinstance(source, list):
+            source = [source]
+
+        if flipped:
+            # Mirror the already scaled frames so both directions share one resample
+            frames = [self.atlas.add(pygame.transform.flip(frame, True, False))
+                      for frame in self.get_frames(name, size)]
+        elif size is None:
+            frames = self.atlas.add_frames(source)
+        else:
+            # Scale straight into atlas regions
+            frames = [pygame.transform.scale(frame, size, self.atlas.allocate(*size))
+                      for frame in source]
+
+        self.cache.put(key, frames)
+        return frames
 
     def get_background(self, level_name):
         """Get a background by level name"""
-        return self.backgrounds.get(level_name)
+        return self.load(self.background_keys.get(level_name))
 
 
 # Global asset manager instance
@@ -301,6 +504,10 @@ def init_assets():
     """Initialize the asset manager"""
     global asset_manager
     asset_manager = AssetManager()
+    if ASSET_LOAD_MODE == 'serial':
+        asset_manager.preload(workers=0)
+    elif ASSET_LOAD_MODE == 'parallel':
+        asset_manager.preload(workers=ASSET_LOAD_WORKERS)
     return asset_manager
 
 def get_assets():
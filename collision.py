@@ -0,0 +1,183 @@
+"""
+Collision helpers: spatial index over a level's static platforms, solidity
+bitmap for tile maps, and merging of touching colliders
+"""
+import pygame
+from config import *
+from entities import Platform
+
+
+class SpatialHash:
+    """Uniform grid over static rects; each cell lists the items overlapping it"""
+
+    def __init__(self, cell_size=COLLISION_CELL_SIZE):
+        self.cell_size = cell_size
+        self.items = []
+        self.cells = {}  # (column, row) -> indices into items, in insertion order
+
+    @classmethod
+    def from_platforms(cls, platforms, cell_size=COLLISION_CELL_SIZE):
+        """Index a list of platforms by their rects"""
+        grid = cls(cell_size)
+        for platform in platforms:
+            grid.insert(platform, platform.rect)
+        return grid
+
+    def __len__(self):
+        return len(self.items)
+
+    def cells_for(self, rect):
+        """Grid cells a rect overlaps (none for an empty rect, which can't collide)"""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        size = self.cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield column, row
+
+    def insert(self, item, rect):
+        """Add a static item; it must not move afterwards"""
+        index = len(self.items)
+        self.items.append(item)
+        for cell in self.cells_for(rect):
+            self.cells.setdefault(cell, []).append(index)
+
+    def query_indices(self, rect):
+        """Sorted indices of the items in the cells rect overlaps"""
+        found = set()
+        for cell in self.cells_for(rect):
+            found.update(self.cells.get(cell, ()))
+        return sorted(found)
+
+    def query(self, rect):
+        """Items in the cells rect overlaps, in insertion order (so collision
+        resolution visits them in the same order as the full list)"""
+        return [self.items[index] for index in self.query_indices(rect)]
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class TileRun:
+    """Collider for a horizontal run of solid map tiles (looks like a platform to the player)"""
+    __slots__ = ('rect',)
+
+    def __init__(self, rect):
+        self.rect = rect
+
+
+class TileGrid:
+    """
+    Solidity bitmap of a tile map's collision layer, one byte per tile (row-major).
+    Each horizontal run of solid tiles collides like the platform the loader would
+    build over it: shifted by offset_x and collider_height tall at the top of the row.
+    """
+
+    def __init__(self, columns, rows, tile_width, tile_height,
+                 collider_height=PLATFORM_HEIGHT, offset_x=PLATFORM_HORIZONTAL_OFFSET):
+        self.columns = columns
+        self.rows = rows
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.collider_height = min(collider_height, tile_height)
+        self.offset_x = offset_x
+        self.solid = bytearray(columns * rows)
+
+    def __len__(self):
+        """Number of solid tiles"""
+        return len(self.solid) - self.solid.count(0)
+
+    def set_solid(self, column, row, solid=True):
+        self.solid[row * self.columns + column] = 1 if solid else 0
+
+    def is_solid(self, column, row):
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return self.solid[row * self.columns + column] == 1
+        return False
+
+    def run_bounds(self, index):
+        """First and one-past-last index of the run of solid tiles containing index"""
+        row_start = index - index % self.columns
+        row_end = row_start + self.columns
+        gap_before = self.solid.rfind(0, row_start, index)
+        gap_after = self.solid.find(0, index, row_end)
+        return (gap_before + 1 if gap_before >= 0 else row_start,
+                gap_after if gap_after >= 0 else row_end)
+
+    def query_indices(self, rect):
+        """Start indices of the runs with a tile whose collider can overlap rect, in
+        row-major order (the same order the runs' platforms would be listed in)"""
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        first_column = max((rect.left - self.offset_x) // self.tile_width, 0)
+        last_column = min((rect.right - 1 - self.offset_x) // self.tile_width, self.columns - 1)
+        first_row = max((rect.top - self.collider_height) // self.tile_height + 1, 0)
+        last_row = min((rect.bottom - 1) // self.tile_height, self.rows - 1)
+
+        found = []
+        for row in range(first_row, last_row + 1):
+            index = row * self.columns + first_column
+            last = row * self.columns + last_column
+            while index <= last:
+                if self.solid[index]:
+                    start, end = self.run_bounds(index)
+                    found.append(start)
+                    index = end
+                else:
+                    index += 1
+        return found
+
+    def __getitem__(self, index):
+        """Collider of the run starting at index"""
+        start, end = self.run_bounds(index)
+        row, column = divmod(start, self.columns)
+        return TileRun(pygame.Rect(column * self.tile_width + self.offset_x, row * self.tile_height,
+                                   (end - start) * self.tile_width, self.collider_height))
+
+
+def merge_rects(rects):
+    """
+    Greedily merge rects whose union is exactly a rect: same row band and touching
+    left to right, or same column band and touching top to bottom, repeated until
+    nothing changes. Empty rects (which never collide) are dropped.
+    Returns: list of (rect, indices of the input rects it covers), in input order
+    """
+    groups = [(rect.copy(), [index]) for index, rect in enumerate(rects) if rect.width and rect.height]
+
+    merged = True
+    while merged:
+        merged = False
+        for horizontal in (True, False):
+            if horizontal:
+                band = lambda r: (r.top, r.height)
+                start, end = (lambda r: r.left), (lambda r: r.right)
+            else:
+                band = lambda r: (r.left, r.width)
+                start, end = (lambda r: r.top), (lambda r: r.bottom)
+
+            groups.sort(key=lambda group: (band(group[0]), start(group[0])))
+            result = []
+            for rect, indices in groups:
+                if result:
+                    last_rect, last_indices = result[-1]
+                    if band(last_rect) == band(rect) and start(rect) <= end(last_rect):
+                        last_rect.union_ip(rect)
+                        last_indices.extend(indices)
+                        merged = True
+                        continue
+                result.append((rect, indices))
+            groups = result
+
+    groups.sort(key=lambda group: min(group[1]))
+    return groups
+
+
+def merge_platforms(platforms):
+    """Replace runs and stacks of touching platforms with one platform each"""
+    merged = []
+    for rect, indices in merge_rects([platform.rect for platform in platforms]):
+        if len(indices) == 1:
+            merged.append(platforms[indices[0]])
+        else:
+            merged.append(Platform(rect.x - PLATFORM_HORIZONTAL_OFFSET, rect.y, rect.width, rect.height))
+    return merged
@@ -1,11 +1,18 @@
 """
 Game constants and configuration settings
 """
+import os
 
 # Screen settings
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60  # Render rate cap; gameplay speed is set by SIMULATION_RATE
+DIRTY_RECT_RENDERING = False  # Only redraw/update changed screen regions (for low-power machines)
+
+# Simulation settings
+SIMULATION_RATE = 60  # Fixed game ticks per second, whatever the frame rate
+MAX_FRAME_TIME = 0.25  # Most real time simulated in one frame, in seconds (a long stall doesn't snowball)
+INTERPOLATION_SNAP_DISTANCE = 64  # Moves longer than this in one tick (respawns) are drawn without easing
 
 # Colors
 WHITE = (255, 255, 255)
@@ -39,6 +46,7 @@ BOSS_HEALTH = 5
 
 # Platform settings
 PLATFORM_HEIGHT = 20
+COLLISION_CELL_SIZE = 64  # Spatial hash cell size for platform collisions
 
 # Game settings
 STARTING_LIVES = 3
@@ -46,9 +54,53 @@ POINTS_PER_COIN = 10
 POINTS_PER_ENEMY = 50
 POINTS_PER_BOSS = 500
 
+# Database settings
+DB_POOL_SIZE = 2  # Long-lived connections per database file (UI thread + a background worker)
+DB_POOL_TIMEOUT = 5  # Seconds to wait for a free pooled connection before failing like a busy database
+DB_BUSY_TIMEOUT = 0.25  # Seconds SQLite waits for another connection's write lock per attempt
+DB_WRITE_ATTEMPTS = 6  # Tries per write transaction while the database stays busy (~3s worst case)
+DB_RETRY_DELAY = 0.05  # Seconds before the first retry; doubles (with jitter) each time
+DB_SYNCHRONOUS = 'NORMAL'  # Safe with WAL; only the last commits can be lost on power failure
+DB_STATEMENT_CACHE_SIZE = 64  # Prepared statements kept per connection
+DB_LOG_LATENCY = False  # Print per-call database latency on exit
+SCORE_BATCH_SIZE = 100  # Most queued score/session records written per transaction
+SCORE_FLUSH_INTERVAL = 0.25  # Seconds the score writer waits for more records before committing
+SCORE_WRITE_ATTEMPTS = 3  # Tries per batch before the score writer spills it to disk for the next start
+LEADERBOARD_PAGE_SIZE = 50  # Rows fetched per leaderboard query
+LEADERBOARD_ROW_HEIGHT = 30
+LEADERBOARD_ROW_CACHE = 200  # Rendered leaderboard rows kept for scrolling back
+LEADERBOARD_RETRY_DELAY = 0.5  # Seconds before retrying a failed leaderboard page; doubles per failure
+LEADERBOARD_RETRY_MAX = 8  # Longest wait between leaderboard page retries, in seconds
+SCORE_RETENTION_DAYS = 30  # Raw scores older than this get rolled into score_history
+SCORE_COMPACTION_BATCH = 500  # Starting rows per compaction transaction; adapts to the time target
+SCORE_COMPACTION_BATCH_TIME = 0.05  # Target seconds per compaction transaction
+VACUUM_STEP_PAGES = 256  # Free pages released per incremental vacuum transaction
+
+# Password hashing. Stored hashes record their own parameters, so these can be
+# changed per deployment; older hashes are upgraded when their owner logs in.
+PASSWORD_KDF = 'scrypt'  # 'scrypt' or 'pbkdf2'
+SCRYPT_N = 2 ** 15  # CPU/memory cost (32 MB with r=8)
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+PASSWORD_SALT_BYTES = 16
+STATS_REFRESH_INTERVAL = 30  # Seconds between background refreshes of the login screen stats
+
 # Level settings
 NUM_LEVELS = 3
 
+# Text settings
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept before the least recently used is dropped
+
+# Asset settings
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+MANIFEST_PATH = os.path.join(ASSETS_DIR, 'manifest.json')  # Every sprite/background the game loads
+ATLAS_PAGE_SIZE = 1024  # Width/height of each texture atlas page in pixels
+ASSET_CACHE_BUDGET = 64 * 1024 * 1024  # Max bytes of decoded surfaces kept in memory
+ASSET_LOAD_MODE = 'lazy'  # 'lazy' = decode on first use, 'serial' or 'parallel' = preload at startup
+ASSET_LOAD_WORKERS = None  # Thread pool size for 'parallel' mode (None = based on CPU count)
+ASSET_PACK_NAME = 'assets.pack'  # Baked pack in assets/ (build with: python asset_pack.py)
+
 # Background settings
 BG_HORIZONTAL_OFFSET = -30  # Positive = shift right, Negative = shift left, 0 = center
 PLATFORM_HORIZONTAL_OFFSET = -5 # Should match BG_HORIZONTAL_OFFSET to keep platforms aligned
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Shared pytest setup: pygame without a window, and the scripts pytest must not collect
+"""
+import os
+
+# No window: must be set before pygame creates the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import pytest
+from config import *
+
+# Interactive level scripts: they open a window and loop until it is closed
+collect_ignore = ['test_level2.py', 'test_level2_direct.py']
+
+
+@pytest.fixture(scope='session')
+def display():
+    """A display surface, needed before loading maps (images are converted to its format)"""
+    pygame.init()
+    yield pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.quit()
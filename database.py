@@ -3,54 +3,368 @@ Database module for handling user authentication and high scores
 """
 import sqlite3
 import hashlib
-from typing import Optional, List, Tuple
+import hmac
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from config import (
+    # Connections and transactions
+    DB_BUSY_TIMEOUT, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_RETRY_DELAY, DB_STATEMENT_CACHE_SIZE, DB_SYNCHRONOUS,
+    DB_WRITE_ATTEMPTS,
+    # Password hashing
+    PASSWORD_KDF, PASSWORD_SALT_BYTES, PBKDF2_ITERATIONS, SCRYPT_N, SCRYPT_P, SCRYPT_R,
+    # Score writing, compaction and stats
+    SCORE_BATCH_SIZE, SCORE_COMPACTION_BATCH, SCORE_COMPACTION_BATCH_TIME, SCORE_FLUSH_INTERVAL,
+    SCORE_RETENTION_DAYS, SCORE_WRITE_ATTEMPTS, STATS_REFRESH_INTERVAL, VACUUM_STEP_PAGES
+)
+
+# Called as listener(user_id, score, level) after save_score commits
+score_listeners: List[Callable[[int, int, int], None]] = []
+
+
+def add_score_listener(listener: Callable[[int, int, int], None]):
+    """Register a callback to run whenever a score is saved"""
+    score_listeners.append(listener)
+
+
+# Schema changes, applied in order and recorded in schema_migrations.
+# Never edit an applied migration; append a new one instead.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """
+    ]),
+    (2, [
+        """
+        CREATE TABLE sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            won INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            ended_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """
+    ]),
+    (3, [
+        # Best score per user and per (user, level), kept current by save_batch
+        """
+        CREATE TABLE user_best (
+            user_id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        "CREATE INDEX user_best_score ON user_best (score DESC, user_id)",
+        """
+        CREATE TABLE level_best (
+            user_id INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (user_id, level),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX level_best_score ON level_best (level, score DESC, user_id)",
+        "INSERT INTO user_best (user_id, score) SELECT user_id, MAX(score) FROM scores GROUP BY user_id",
+        """
+        INSERT INTO level_best (user_id, level, score)
+        SELECT user_id, level, MAX(score) FROM scores GROUP BY user_id, level
+        """
+    ]),
+    (4, [
+        # Per user and level totals of scores compacted out of the scores table
+        """
+        CREATE TABLE score_history (
+            user_id INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            best INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (user_id, level),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+        """
+    ]),
+]
+
+
+def is_busy(error: sqlite3.OperationalError) -> bool:
+    """True if an error means another connection holds the lock (SQLITE_BUSY/LOCKED)"""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def run_write(conn: sqlite3.Connection, work: Callable[[sqlite3.Connection], object]):
+    """
+    Run work(conn) in its own BEGIN IMMEDIATE transaction and commit it.
+    If another process still holds the write lock once the busy timeout runs
+    out, roll back and retry with jittered backoff, up to DB_WRITE_ATTEMPTS.
+    Returns: whatever work returns
+    """
+    delay = DB_RETRY_DELAY
+    for attempt in range(1, DB_WRITE_ATTEMPTS + 1):
+        try:
+            # Take the write lock up front so the transaction never has to upgrade mid-way
+            conn.execute("BEGIN IMMEDIATE")
+            result = work(conn)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if not is_busy(e) or attempt == DB_WRITE_ATTEMPTS:
+                raise
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        time.sleep(random.uniform(delay / 2, delay))
+        delay *= 2
+
+
+def migrate(conn: sqlite3.Connection):
+    """Apply any migrations this database file hasn't seen yet"""
+    run_write(conn, lambda conn: conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+    def apply(conn, version, statements):
+        # Checked under the write lock: another process may have just applied it
+        if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+            return False
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute("INSERT INTO schema_migrations (version) VALUES (?)", (version,))
+        return True
+
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    for version, statements in MIGRATIONS:
+        if version not in applied and run_write(conn, lambda conn: apply(conn, version, statements)):
+            print(f"Applied database migration {version}")
+
+
+class ConnectionPool:
+    """A few long-lived connections to one database file, shared across threads"""
+
+    def __init__(self, db_name: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open and tune a new connection"""
+        # Each connection is used by one thread at a time, handed over through the pool
+        conn = sqlite3.connect(self.db_name, timeout=DB_BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE)
+        # Only takes effect on a new file; existing ones need enable_incremental_vacuum
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening one if the pool isn't full, else wait for one.
+        Raises sqlite3.OperationalError if none frees up in time (e.g. a leaked connection),
+        so callers handle it like a busy database instead of hanging."""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_create = self.created < self.size
+            if can_create:
+                self.created += 1
+        if not can_create:
+            try:
+                return self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"no free database connection after {self.timeout}s ({self.size} in use)") from None
+
+        try:
+            return self.connect()
+        except sqlite3.Error:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        self.idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self.created -= 1
+
+
+# One pool per database file, migrated the first time it's opened in this process
+pools: Dict[str, ConnectionPool] = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str) -> ConnectionPool:
+    """Get the shared pool for a database file"""
+    path = os.path.abspath(db_name)
+    with pools_lock:
+        pool = pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            with pool.connection() as conn:
+                migrate(conn)
+            pools[path] = pool
+        return pool
+
+
+def close_pools():
+    """Close every pooled connection (call on shutdown)"""
+    with pools_lock:
+        for pool in pools.values():
+            pool.close()
+        pools.clear()
+
+
+# Recent call durations in milliseconds, per Database method
+call_timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+
+
+def timed(method):
+    """Record how long each call to a Database method takes"""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            call_timings[method.__name__].append((time.perf_counter() - start) * 1000)
+    return wrapper
+
+
+def latency_report() -> List[str]:
+    """One line per Database method: call count and p50/p95/max latency"""
+    lines = []
+    for name, samples in sorted(call_timings.items()):
+        ordered = sorted(samples)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        lines.append(f"{name}: {len(ordered)} calls, p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {ordered[-1]:.2f} ms")
+    return lines
 
 
 class Database:
     def __init__(self, db_name: str = "game_data.db"):
-        """Initialize database connection and create tables if they don't exist"""
+        """Attach to the shared connection pool for the database file"""
         self.db_name = db_name
-        self.create_tables()
-    
-    def get_connection(self):
-        """Get a database connection"""
-        return sqlite3.connect(self.db_name)
-    
-    def create_tables(self):
-        """Create necessary tables for users and scores"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create scores table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                score INTEGER NOT NULL,
-                level INTEGER NOT NULL,
-                achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        self.pool = get_pool(db_name)
+    
+    def connection(self):
+        """Borrow a pooled connection: `with self.connection() as conn:`"""
+        return self.pool.connection()
+    
+    def write(self, work: Callable[[sqlite3.Connection], object]):
+        """Run work(conn) as one short write transaction, retried while the database is busy"""
+        with self.connection() as conn:
+            return run_write(conn, work)
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """
+        Hash a password with a random salt and the configured KDF
+        Returns: 'scrypt$n$r$p$salt$key' or 'pbkdf2_sha256$iterations$salt$key' (hex)
+        """
+        salt = os.urandom(PASSWORD_SALT_BYTES)
+        if PASSWORD_KDF == 'pbkdf2':
+            key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+            return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${key.hex()}"
+        
+        key = Database.scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${key.hex()}"
     
+    @staticmethod
+    def scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        """Derive a 32-byte scrypt key, allowing the memory the parameters need"""
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2), dklen=32)
+    
+    @staticmethod
+    def verify_password(password: str, stored: str) -> bool:
+        """Check a password against a stored hash (KDF or legacy unsalted SHA-256).
+        A malformed or truncated hash, or KDF settings this machine can't run, never match."""
+        parts = stored.split('$')
+        try:
+            if parts[0] == 'scrypt' and len(parts) == 6:
+                n, r, p = (int(value) for value in parts[1:4])
+                key = Database.scrypt(password, bytes.fromhex(parts[4]), n, r, p)
+            elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+                key = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(parts[2]), int(parts[1]))
+            elif len(parts) == 1:
+                # Accounts created before salted hashing
+                return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+            else:
+                return False
+            return hmac.compare_digest(key.hex(), parts[-1])
+        except (ValueError, TypeError, OverflowError, MemoryError) as e:
+            print(f"Unusable password hash: {e}")
+            return False
+    
+    @staticmethod
+    def needs_rehash(stored: str) -> bool:
+        """True if a stored hash is legacy or uses other KDF settings than the configured ones"""
+        if PASSWORD_KDF == 'pbkdf2':
+            return not stored.startswith(f"pbkdf2_sha256${PBKDF2_ITERATIONS}$")
+        return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+    
+    @timed
     def register_user(self, username: str, password: str) -> Tuple[bool, str]:
         """
         Register a new user
@@ -65,111 +379,599 @@ class Database:
         if len(password) < 4:
             return False, "Password must be at least 4 characters"
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        hashed_password = self.hash_password(password)
         try:
-            hashed_password = self.hash_password(password)
-            cursor.execute(
+            self.write(lambda conn: conn.execute(
                 "INSERT INTO users (username, password) VALUES (?, ?)",
                 (username, hashed_password)
-            )
-            conn.commit()
+            ))
             return True, "Registration successful!"
         except sqlite3.IntegrityError:
             return False, "Username already exists"
-        finally:
-            conn.close()
     
+    @timed
     def login_user(self, username: str, password: str) -> Optional[int]:
         """
         Verify user credentials and return user ID if successful
         Returns: user_id if successful, None otherwise
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            result = conn.execute(
+                "SELECT id, password FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
         
-        hashed_password = self.hash_password(password)
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ? AND password = ?",
-            (username, hashed_password)
-        )
+        # The KDF is slow on purpose; don't hold a pooled connection while it runs
+        if not result or not self.verify_password(password, result[1]):
+            return None
         
-        result = cursor.fetchone()
-        conn.close()
+        user_id, stored = result
+        if self.needs_rehash(stored):
+            # Upgrade legacy or outdated hashes while we have the plain password
+            new_hash = self.hash_password(password)
+            self.write(lambda conn: conn.execute(
+                "UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                (new_hash, user_id, stored)
+            ))
         
-        return result[0] if result else None
+        return user_id
     
     def save_score(self, user_id: int, score: int, level: int):
-        """Save a user's score for a specific level"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT INTO scores (user_id, score, level) VALUES (?, ?, ?)",
-            (user_id, score, level)
-        )
+        """Save a user's score for a specific level (timed as save_batch, which does the write)"""
+        self.save_batch([(user_id, score, level)], [])
+    
+    @timed
+    def save_batch(self, scores: List[Tuple[int, int, int]], sessions: List[Tuple[int, int, int, bool, float]]):
+        """
+        Save (user_id, score, level) scores and (user_id, score, level, won, duration)
+        sessions in one transaction
+        """
+        def insert(conn):
+            conn.executemany(
+                "INSERT INTO scores (user_id, score, level) VALUES (?, ?, ?)",
+                scores
+            )
+            conn.executemany(
+                "INSERT INTO sessions (user_id, score, level, won, duration) VALUES (?, ?, ?, ?, ?)",
+                sessions
+            )
+            # Keep the best-score tables in step with the rows just inserted
+            conn.executemany("""
+                INSERT INTO user_best (user_id, score) VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET score = excluded.score
+                WHERE excluded.score > user_best.score
+            """, [(user_id, score) for user_id, score, level in scores])
+            conn.executemany("""
+                INSERT INTO level_best (user_id, level, score) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, level) DO UPDATE SET score = excluded.score
+                WHERE excluded.score > level_best.score
+            """, [(user_id, level, score) for user_id, score, level in scores])
         
-        conn.commit()
-        conn.close()
+        self.write(insert)
+
+        for user_id, score, level in scores:
+            for listener in score_listeners:
+                listener(user_id, score, level)
     
+    @timed
     def get_user_high_score(self, user_id: int) -> int:
         """Get the highest score for a specific user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            result = conn.execute(
+                "SELECT score FROM user_best WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
         
-        cursor.execute(
-            "SELECT MAX(score) FROM scores WHERE user_id = ?",
-            (user_id,)
-        )
-        
-        result = cursor.fetchone()
-        conn.close()
+        return result[0] if result and result[0] else 0
+    
+    @timed
+    def get_user_rank(self, user_id: int) -> Optional[int]:
+        """
+        Get a user's leaderboard position (1 = best), counting tied users as one place
+        Returns: rank, or None if the user has no scores
+        """
+        with self.connection() as conn:
+            result = conn.execute("""
+                SELECT 1 + (SELECT COUNT(*) FROM user_best WHERE score > mine.score)
+                FROM user_best mine
+                WHERE mine.user_id = ?
+            """, (user_id,)).fetchone()
         
-        return result[0] if result[0] else 0
+        return result[0] if result else None
     
+    @timed
     def get_global_high_score(self) -> Tuple[int, str]:
         """
         Get the global high score and username
         Returns: (score, username)
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT MAX(s.score), u.username
-            FROM scores s
-            JOIN users u ON s.user_id = u.id
-            GROUP BY s.user_id
-            ORDER BY MAX(s.score) DESC
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            result = conn.execute("""
+                SELECT b.score, u.username
+                FROM user_best b
+                JOIN users u ON b.user_id = u.id
+                ORDER BY b.score DESC, b.user_id
+                LIMIT 1
+            """).fetchone()
         
         if result and result[0]:
             return result[0], result[1]
         return 0, "None"
     
+    @timed
     def get_top_scores(self, limit: int = 10) -> List[Tuple[str, int]]:
         """
         Get top scores across all users
         Returns: List of (username, score) tuples
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT u.username, b.score
+                FROM user_best b
+                JOIN users u ON b.user_id = u.id
+                ORDER BY b.score DESC, b.user_id
+                LIMIT ?
+            """, (limit,)).fetchall()
+    
+    @timed
+    def get_player_count(self) -> int:
+        """Get the number of players on the leaderboard (users with at least one score)"""
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM user_best").fetchone()[0]
+    
+    @timed
+    def get_leaderboard_page(self, cursor: Optional[Tuple[int, int]] = None,
+                             limit: int = 50, backwards: bool = False) -> List[Tuple[int, str, int]]:
+        """
+        Get one page of the leaderboard in rank order. cursor is the (score, user_id)
+        of a row from a previous page; the page starts right after it, or ends right
+        before it when backwards. Without a cursor: the first page, or the last one.
+        Returns: List of (user_id, username, score) tuples, best first
+        """
+        with self.connection() as conn:
+            return self.query_leaderboard(conn, cursor, limit, backwards)
+    
+    def query_leaderboard(self, conn: sqlite3.Connection, cursor: Optional[Tuple[int, int]],
+                          limit: int, backwards: bool) -> List[Tuple[int, str, int]]:
+        """Keyset query behind get_leaderboard_page; seeks on the user_best_score index"""
+        # The plain score bound is what lets SQLite seek instead of scanning from the top
+        if cursor is None:
+            where, args = "", ()
+        elif backwards:
+            where = "WHERE b.score >= ? AND (b.score > ? OR b.user_id < ?)"
+            args = (cursor[0], cursor[0], cursor[1])
+        else:
+            where = "WHERE b.score <= ? AND (b.score < ? OR b.user_id > ?)"
+            args = (cursor[0], cursor[0], cursor[1])
+        order = "b.score ASC, b.user_id DESC" if backwards else "b.score DESC, b.user_id ASC"
         
-        cursor.execute("""
-            SELECT u.username, MAX(s.score) as high_score
-            FROM scores s
-            JOIN users u ON s.user_id = u.id
-            GROUP BY s.user_id
-            ORDER BY high_score DESC
+        rows = conn.execute(f"""
+            SELECT b.user_id, u.username, b.score
+            FROM user_best b
+            JOIN users u ON b.user_id = u.id
+            {where}
+            ORDER BY {order}
             LIMIT ?
-        """, (limit,))
+        """, args + (limit,)).fetchall()
         
-        results = cursor.fetchall()
-        conn.close()
+        if backwards:
+            rows.reverse()
+        return rows
+    
+    @timed
+    def get_user_position(self, user_id: int) -> Optional[int]:
+        """
+        Get a user's row number in leaderboard order (ties broken by user id, like the pages)
+        Returns: position starting at 1, or None if the user has no scores
+        """
+        with self.connection() as conn:
+            return self.query_position(conn, user_id)
+    
+    def query_position(self, conn: sqlite3.Connection, user_id: int) -> Optional[int]:
+        """Position query behind get_user_position"""
+        result = conn.execute("""
+            SELECT 1 + (SELECT COUNT(*) FROM user_best WHERE score > mine.score)
+                     + (SELECT COUNT(*) FROM user_best WHERE score = mine.score AND user_id < mine.user_id)
+            FROM user_best mine
+            WHERE mine.user_id = ?
+        """, (user_id,)).fetchone()
+        
+        return result[0] if result else None
+    
+    @timed
+    def get_users_around(self, user_id: int, radius: int = 5) -> Tuple[Optional[int], List[Tuple[int, str, int]]]:
+        """
+        Get the leaderboard rows around a user: up to radius players either side
+        Returns: (position of the first row, rows), or (None, []) if the user has no scores
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN")  # One read snapshot so the rows and the position agree
+            with conn:
+                mine = conn.execute("""
+                    SELECT b.user_id, u.username, b.score
+                    FROM user_best b
+                    JOIN users u ON b.user_id = u.id
+                    WHERE b.user_id = ?
+                """, (user_id,)).fetchone()
+                if mine is None:
+                    return None, []
+                
+                cursor = (mine[2], mine[0])
+                position = self.query_position(conn, user_id)
+                before = self.query_leaderboard(conn, cursor, radius, backwards=True)
+                after = self.query_leaderboard(conn, cursor, radius, backwards=False)
         
-        return results
\ No newline at end of file
+        return position - len(before), before + [mine] + after
+    
+    @timed
+    def get_level_high_score(self, user_id: int, level: int) -> int:
+        """Get a user's best score among games that ended on a specific level"""
+        with self.connection() as conn:
+            result = conn.execute(
+                "SELECT score FROM level_best WHERE user_id = ? AND level = ?",
+                (user_id, level)
+            ).fetchone()
+        
+        return result[0] if result else 0
+    
+    @timed
+    def get_level_top_scores(self, level: int, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get top scores among games that ended on a specific level
+        Returns: List of (username, score) tuples
+        """
+        with self.connection() as conn:
+            return conn.execute("""
+                SELECT u.username, b.score
+                FROM level_best b
+                JOIN users u ON b.user_id = u.id
+                WHERE b.level = ?
+                ORDER BY b.score DESC, b.user_id
+                LIMIT ?
+            """, (level, limit)).fetchall()
+    
+    @timed
+    def compact_scores(self, max_age_days: float = SCORE_RETENTION_DAYS,
+                       max_seconds: Optional[float] = None) -> Dict[str, float]:
+        """
+        Roll scores older than max_age_days into score_history (best, games and total
+        per user and level) and delete them. Runs as many short transactions, each
+        sized to take about SCORE_COMPACTION_BATCH_TIME, until nothing is left or
+        max_seconds runs out. Leaderboards read the best-score tables, so they don't change.
+        Returns: {'rows': scores compacted, 'batches': transactions, 'seconds': elapsed}
+        """
+        start = time.perf_counter()
+        with self.connection() as conn:
+            cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{max_age_days} days",)).fetchone()[0]
+        
+        def compact_batch(conn, size):
+            # Old rows have the lowest ids, so this stops after about `size` rows
+            last_id = conn.execute("""
+                SELECT MAX(id) FROM (
+                    SELECT id FROM scores WHERE achieved_at < ? ORDER BY id LIMIT ?
+                )
+            """, (cutoff, size)).fetchone()[0]
+            if last_id is None:
+                return 0
+            
+            conn.execute("""
+                INSERT INTO score_history (user_id, level, best, games, total)
+                SELECT user_id, level, MAX(score), COUNT(*), SUM(score)
+                FROM scores
+                WHERE id <= ? AND achieved_at < ?
+                GROUP BY user_id, level
+                ON CONFLICT (user_id, level) DO UPDATE SET
+                    best = MAX(best, excluded.best),
+                    games = games + excluded.games,
+                    total = total + excluded.total
+            """, (last_id, cutoff))
+            return conn.execute(
+                "DELETE FROM scores WHERE id <= ? AND achieved_at < ?",
+                (last_id, cutoff)
+            ).rowcount
+        
+        size = SCORE_COMPACTION_BATCH
+        rows = batches = 0
+        while max_seconds is None or time.perf_counter() - start < max_seconds:
+            batch_start = time.perf_counter()
+            count = self.write(lambda conn: compact_batch(conn, size))
+            if not count:
+                break
+            rows += count
+            batches += 1
+            
+            # Keep each transaction near the target so other writers never wait long
+            took = time.perf_counter() - batch_start
+            if took > SCORE_COMPACTION_BATCH_TIME:
+                size = max(50, size // 2)
+            elif took < SCORE_COMPACTION_BATCH_TIME / 2:
+                size *= 2
+            time.sleep(took)  # Leave the lock free at least half the time for game processes
+        
+        return {'rows': rows, 'batches': batches, 'seconds': time.perf_counter() - start}
+    
+    @timed
+    def incremental_vacuum(self, max_seconds: Optional[float] = None) -> int:
+        """
+        Give free pages back to the filesystem, VACUUM_STEP_PAGES per transaction
+        Returns: pages freed (always 0 unless auto_vacuum is INCREMENTAL)
+        """
+        start = time.perf_counter()
+        with self.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            
+            freed = 0
+            busy = 0
+            while max_seconds is None or time.perf_counter() - start < max_seconds:
+                step = min(conn.execute("PRAGMA freelist_count").fetchone()[0], VACUUM_STEP_PAGES)
+                if not step:
+                    break
+                try:
+                    # executescript runs the pragma to completion; execute() frees a single page
+                    conn.executescript(f"PRAGMA incremental_vacuum({step})")
+                except sqlite3.OperationalError as e:
+                    busy += 1
+                    if not is_busy(e) or busy == DB_WRITE_ATTEMPTS:
+                        raise
+                    time.sleep(DB_RETRY_DELAY * busy)
+                    continue
+                busy = 0
+                freed += step
+        return freed
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Switch a database created before incremental auto-vacuum over to it.
+        This runs one full VACUUM, which locks the file while it copies it.
+        Returns: True if the database was converted
+        """
+        with self.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        return True
+
+
+class StatsCache:
+    """Per-user and global best scores, fetched in the background and read without blocking"""
+
+    def __init__(self, db: Database, refresh_interval: float = STATS_REFRESH_INTERVAL):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.user_best: Dict[int, int] = {}
+        self.global_best: Optional[Tuple[int, str]] = None
+        self.watched_users = set()
+        self.refreshing = False
+        self.pending = False  # Another refresh was requested while one was running
+        self.last_refresh = 0.0
+        add_score_listener(self.on_score_saved)
+
+    def watch(self, user_id: int):
+        """Start tracking a user's best score (e.g. on login) and fetch it now"""
+        with self.lock:
+            self.watched_users.add(user_id)
+        self.refresh()
+
+    def get_user_best(self, user_id: int) -> Optional[int]:
+        """Cached best score for a user, or None if it hasn't been fetched yet"""
+        return self.user_best.get(user_id)
+
+    def get_global_best(self) -> Optional[Tuple[int, str]]:
+        """Cached (score, username) global best, or None if it hasn't been fetched yet"""
+        return self.global_best
+
+    def refresh_if_stale(self):
+        """Refresh in the background if the cached values are older than the interval"""
+        if time.monotonic() - self.last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def refresh(self):
+        """Re-read the watched users' and the global best scores on a worker thread"""
+        with self.lock:
+            self.last_refresh = time.monotonic()
+            if self.refreshing:
+                self.pending = True
+                return
+            self.refreshing = True
+        threading.Thread(target=self.run_refresh, daemon=True).start()
+
+    def run_refresh(self):
+        """Worker thread: query the database until no more refreshes are pending"""
+        while True:
+            with self.lock:
+                users = list(self.watched_users)
+                self.pending = False
+            try:
+                user_best = {user_id: self.db.get_user_high_score(user_id) for user_id in users}
+                global_best = self.db.get_global_high_score()
+            except sqlite3.Error as e:
+                print(f"Could not refresh score stats: {e}")
+            else:
+                with self.lock:
+                    self.user_best.update(user_best)
+                    self.global_best = global_best
+            with self.lock:
+                if not self.pending:
+                    self.refreshing = False
+                    return
+
+    def on_score_saved(self, user_id: int, score: int, level: int):
+        """Fold a newly saved score in right away, then confirm it from the database"""
+        with self.lock:
+            if score > self.user_best.get(user_id, 0):
+                self.user_best[user_id] = score
+        self.refresh()
+
+
+# Shared stats cache, created on first use
+stats_cache = None
+
+
+def get_stats_cache() -> StatsCache:
+    """Get the shared stats cache"""
+    global stats_cache
+    if stats_cache is None:
+        stats_cache = StatsCache(Database())
+    return stats_cache
+
+
+class ScoreWriter:
+    """Write-behind queue: the game loop submits records instantly and a
+    worker thread commits them in batches. Batches that can't be written are
+    spilled to a file next to the database and replayed on the next start."""
+
+    STOP = object()  # Queued by close() after the last record
+
+    def __init__(self, db: Database, batch_size: int = SCORE_BATCH_SIZE,
+                 flush_interval: float = SCORE_FLUSH_INTERVAL):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = f"{db.db_name}-unsaved.jsonl"
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit_score(self, user_id: int, score: int, level: int):
+        """Queue a score; returns immediately"""
+        self.queue.put(('score', (user_id, score, level)))
+
+    def submit_session(self, user_id: int, score: int, level: int, won: bool, duration: float):
+        """Queue a finished play session; returns immediately"""
+        self.queue.put(('session', (user_id, score, level, int(won), duration)))
+
+    def run(self):
+        """Worker thread: wait for records, batch whatever else is queued, then write"""
+        self.replay_spilled()
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            # Let a burst of submissions collect into one transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not self.STOP:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            stopping = batch[-1] is self.STOP
+            records = [item for item in batch if item is not self.STOP]
+            if records:
+                self.write(records)
+
+    def write(self, records):
+        """Commit one batch, retrying a few times before spilling it to disk"""
+        pending = list(records)
+        for attempt in range(1, SCORE_WRITE_ATTEMPTS + 1):
+            try:
+                self.save(pending)
+                return
+            except Exception as e:  # Whatever goes wrong, the worker has to keep draining the queue
+                print(f"Could not save {len(pending)} score records (attempt {attempt}): {e}")
+                time.sleep(self.flush_interval * attempt)
+        self.spill(pending)
+
+    def save(self, pending):
+        """Commit the pending records, removing each from the list once it is committed.
+        A record that breaks a constraint can never be saved, so it is reported and
+        skipped rather than holding back the rest of its batch."""
+        def save_batch(records):
+            self.db.save_batch([record for kind, record in records if kind == 'score'],
+                               [record for kind, record in records if kind == 'session'])
+
+        try:
+            save_batch(pending)
+            pending.clear()
+        except sqlite3.IntegrityError:
+            while pending:
+                try:
+                    save_batch(pending[:1])
+                except sqlite3.IntegrityError as e:
+                    print(f"Rejected score record {pending[0]}: {e}")
+                pending.pop(0)
+
+    def spill(self, records) -> bool:
+        """Append records that couldn't be written to the spill file.
+        Returns: False if they couldn't be kept either"""
+        try:
+            with open(self.spill_path, 'a') as f:
+                for kind, record in records:
+                    f.write(json.dumps([kind, record]) + "\n")
+            print(f"Kept {len(records)} unsaved score records in {self.spill_path}")
+            return True
+        except Exception as e:
+            print(f"Lost {len(records)} score records: {e}")
+            return False
+
+    def replay_spilled(self):
+        """Worker thread: write the records a previous run had to spill. Every process
+        on the database shares the spill file, so it is claimed by renaming it first:
+        no two writers replay the same records, and records spilled meanwhile go to a
+        new file. Records that still can't be committed are spilled again."""
+        claimed = f"{self.spill_path}.{os.getpid()}-{threading.get_ident()}.replaying"
+        try:
+            os.replace(self.spill_path, claimed)
+        except FileNotFoundError:
+            return  # Nothing spilled, or another writer claimed it first
+        except OSError as e:
+            print(f"Could not claim {self.spill_path}: {e}")
+            return
+
+        pending = []
+        with open(claimed) as f:
+            for line in filter(str.strip, f):
+                try:
+                    kind, record = json.loads(line)
+                    pending.append((kind, tuple(record)))
+                except ValueError:
+                    print(f"Skipped an unreadable line in {self.spill_path}: {line.strip()}")
+        count = len(pending)
+        try:
+            self.save(pending)
+            print(f"Saved {count} score records left over from a previous run")
+        except Exception as e:
+            # save() removes what it committed, so only the rest is kept
+            print(f"Could not replay {count} score records, {len(pending)} not saved: {e}")
+            if not self.spill(pending):
+                print(f"Keeping {claimed}")
+                return
+        os.remove(claimed)
+
+    def close(self):
+        """Write everything still queued and stop the worker (call on shutdown).
+        Records the worker didn't get to are spilled, never dropped."""
+        self.queue.put(self.STOP)
+        self.thread.join()
+        leftovers = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self.STOP:
+                leftovers.append(item)
+        if leftovers:
+            self.spill(leftovers)
+
+
+# Shared score writer, started on first use
+score_writer = None
+
+
+def get_score_writer() -> ScoreWriter:
+    """Get the shared score writer"""
+    global score_writer
+    if score_writer is None:
+        score_writer = ScoreWriter(Database())
+    return score_writer
+
+
+def close_score_writer():
+    """Drain and stop the shared score writer, if it was started"""
+    global score_writer
+    if score_writer is not None:
+        score_writer.close()
+        score_writer = None
@@ -0,0 +1,202 @@
+"""
+Database benchmark: fills a scratch database and times the Database API
+
+Run `python db_benchmark.py --users 10000 --scores 5000000 -w 4 -o results.json`
+to time each call single-threaded, then again with N concurrent writer
+processes, and write p50/p95/p99 latency and throughput as JSON so schema and
+connection changes can be compared run to run.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from config import *
+from database import Database, close_pools
+
+FILL_BATCH = 50000  # Scores inserted per transaction while filling
+
+
+def percentile(ordered, fraction):
+    """Value at a fraction (0-1) of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, elapsed):
+    """Latency percentiles in milliseconds plus throughput for a list of call durations"""
+    ordered = sorted(latencies)
+    return {
+        'calls': len(ordered),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'ops_per_sec': round(len(ordered) / elapsed, 1) if elapsed else None
+    }
+
+
+def time_calls(call, count):
+    """Run call(i) count times; returns (durations, total seconds)"""
+    durations = []
+    start = time.perf_counter()
+    for i in range(count):
+        before = time.perf_counter()
+        call(i)
+        durations.append(time.perf_counter() - before)
+    return durations, time.perf_counter() - start
+
+
+def remove_database(db_path):
+    """Delete a scratch database and its WAL files"""
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def fill(db, users, scores, seed):
+    """Insert users (sharing one precomputed password hash) and random scores"""
+    rng = random.Random(seed)
+    # Hashing every account with the real KDF would take minutes; the hash is only read back
+    password_hash = db.hash_password('password')
+    with db.connection() as conn:
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (username, password) VALUES (?, ?)",
+                ((f"user{i}", password_hash) for i in range(users))
+            )
+
+    written = 0
+    while written < scores:
+        count = min(FILL_BATCH, scores - written)
+        batch = [(rng.randint(1, users), rng.randint(0, 100000), rng.randint(1, NUM_LEVELS))
+                 for _ in range(count)]
+        db.save_batch(batch, [])
+        written += count
+        print(f"  {written}/{scores} scores", end='\r')
+    print()
+
+
+def run_single(db, users, samples, auth_samples, seed):
+    """Time every benchmarked call on one thread"""
+    rng = random.Random(seed)
+    user_ids = [rng.randint(1, users) for _ in range(samples)]
+    run_id = int(time.time() * 1000)
+    calls = {
+        'register_user': (lambda i: db.register_user(f"bench{run_id}_{i}", 'password'), auth_samples),
+        'login_user': (lambda i: db.login_user(f"user{user_ids[i] - 1}", 'password'), auth_samples),
+        'save_score': (lambda i: db.save_score(user_ids[i], rng.randint(0, 100000), 1), samples),
+        'get_user_high_score': (lambda i: db.get_user_high_score(user_ids[i]), samples),
+        'get_global_high_score': (lambda i: db.get_global_high_score(), samples),
+        'get_top_scores': (lambda i: db.get_top_scores(10), samples)
+    }
+
+    results = {}
+    for name, (call, count) in calls.items():
+        durations, elapsed = time_calls(call, count)
+        results[name] = summarize(durations, elapsed)
+        print(f"  {name}: {results[name]}")
+    return results
+
+
+def writer_process(db_path, users, count, seed, barrier):
+    """Concurrent writer: save scores and report (durations, start, end, errors)"""
+    rng = random.Random(seed)
+    db = Database(db_path)
+    durations = []
+    errors = 0
+    barrier.wait()  # Start writing together so the processes really contend
+    start = time.time()
+    for _ in range(count):
+        before = time.perf_counter()
+        try:
+            db.save_score(rng.randint(1, users), rng.randint(0, 100000), 1)
+        except sqlite3.Error:
+            errors += 1
+        durations.append(time.perf_counter() - before)
+    return durations, start, time.time(), errors
+
+
+def run_concurrent(db_path, users, writers, count, seed):
+    """Time save_score from several processes writing at once"""
+    # Spawned, not forked, so no process inherits another's pooled connections
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager, context.Pool(writers) as pool:
+        barrier = manager.Barrier(writers)
+        jobs = [(db_path, users, count, seed + n, barrier) for n in range(writers)]
+        reports = pool.starmap(writer_process, jobs)
+
+    durations = [d for report in reports for d in report[0]]
+    elapsed = max(report[2] for report in reports) - min(report[1] for report in reports)
+    result = summarize(durations, elapsed)
+    result['writers'] = writers
+    result['errors'] = sum(report[3] for report in reports)
+    print(f"  save_score x{writers} processes: {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database.py against a scratch database")
+    parser.add_argument('--users', type=int, default=10000, help="users to create")
+    parser.add_argument('--scores', type=int, default=5000000, help="scores to create")
+    parser.add_argument('--samples', type=int, default=2000, help="timed calls per query and save")
+    parser.add_argument('--auth-samples', type=int, default=20,
+                        help="timed register/login calls (each runs the password KDF)")
+    parser.add_argument('-w', '--writers', type=int, nargs='*', default=[2, 4],
+                        help="concurrent writer process counts to try")
+    parser.add_argument('--writer-ops', type=int, default=1000, help="save_score calls per writer process")
+    parser.add_argument('--db', help="scratch database path (default: a temporary file)")
+    parser.add_argument('--keep', action='store_true', help="reuse an existing --db instead of refilling it")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.gettempdir(), 'db_benchmark.db')
+    if not args.keep:
+        remove_database(db_path)
+
+    results = {
+        'settings': vars(args),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'password_kdf': PASSWORD_KDF,
+            'db_synchronous': DB_SYNCHRONOUS,
+            'db_pool_size': DB_POOL_SIZE
+        }
+    }
+
+    db = Database(db_path)
+    if not args.keep:
+        print(f"Filling {db_path} with {args.users} users and {args.scores} scores")
+        start = time.perf_counter()
+        fill(db, args.users, args.scores, args.seed)
+        results['fill_seconds'] = round(time.perf_counter() - start, 2)
+
+    print("Single-threaded:")
+    results['single'] = run_single(db, args.users, args.samples, args.auth_samples, args.seed)
+    close_pools()
+
+    print("Concurrent writers:")
+    results['concurrent'] = [run_concurrent(db_path, args.users, writers, args.writer_ops, args.seed)
+                             for writers in args.writers]
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if not args.db:
+        remove_database(db_path)
+
+
+if __name__ == "__main__":
+    main()
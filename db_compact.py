@@ -0,0 +1,46 @@
+"""
+Score compaction job: keeps the scores table from growing forever
+
+Run `python db_compact.py` (e.g. nightly) to roll scores older than
+SCORE_RETENTION_DAYS into per-user, per-level totals and give the freed
+space back with an incremental vacuum. Safe to run while games are playing:
+work happens in short transactions.
+"""
+import argparse
+import os
+from config import *
+from database import Database, close_pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact old scores into per-user, per-level totals")
+    parser.add_argument('--db', default="game_data.db", help="database file (default: game_data.db)")
+    parser.add_argument('--days', type=float, default=SCORE_RETENTION_DAYS,
+                        help="keep raw scores newer than this many days")
+    parser.add_argument('--max-seconds', type=float, help="stop compacting after this long (resume next run)")
+    parser.add_argument('--convert', action='store_true',
+                        help="switch an older database to incremental vacuum (one full VACUUM)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    size_before = os.path.getsize(args.db)
+
+    if args.convert and db.enable_incremental_vacuum():
+        print("Converted the database to incremental auto-vacuum")
+
+    result = db.compact_scores(args.days, args.max_seconds)
+    print(f"Compacted {result['rows']} scores in {result['batches']} batches ({result['seconds']:.2f}s)")
+
+    freed = db.incremental_vacuum(args.max_seconds)
+    if freed:
+        print(f"Released {freed} free pages")
+    elif result['rows'] and not args.convert:
+        print("Database predates incremental vacuum; run with --convert once to reclaim space")
+
+    close_pools()
+    size_after = os.path.getsize(args.db)
+    print(f"Database size: {size_before / 1024:.0f} KB -> {size_after / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
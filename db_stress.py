@@ -0,0 +1,146 @@
+"""
+Database stress test: several game processes sharing one database file
+
+Run `python db_stress.py -p 8` to have each process register and log in its
+own users and save scores as fast as it can, all at once. Afterwards every
+write is checked against the database and tail latency against a bound.
+Exits 1 if anything was lost, a call failed, or the bound was exceeded.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from config import *
+from database import Database, close_pools
+from db_benchmark import remove_database, summarize
+
+
+def stress_process(db_path, run, number, users, scores, barrier):
+    """One game process: register, log in and save; returns what it wrote and how long calls took"""
+    rng = random.Random(number)
+    db = Database(db_path)
+    timings = {'register_user': [], 'login_user': [], 'save_score': []}
+    errors = []
+    saved = []
+
+    def timed_call(name, call):
+        before = time.perf_counter()
+        try:
+            return call()
+        except sqlite3.Error as e:
+            errors.append(f"{name}: {e}")
+        finally:
+            timings[name].append(time.perf_counter() - before)
+
+    barrier.wait()  # Every process starts hammering at the same moment
+    start = time.time()
+
+    user_ids = []
+    for i in range(users):
+        username = f"stress{run}_{number}_{i}"
+        result = timed_call('register_user', lambda: db.register_user(username, 'password'))
+        if result and not result[0]:
+            errors.append(f"register_user {username}: {result[1]}")
+        user_id = timed_call('login_user', lambda: db.login_user(username, 'password'))
+        if user_id is None:
+            errors.append(f"login_user {username} failed")
+        else:
+            user_ids.append(user_id)
+
+    for _ in range(scores if user_ids else 0):
+        record = (rng.choice(user_ids), rng.randint(0, 100000), rng.randint(1, NUM_LEVELS))
+        before = len(errors)
+        timed_call('save_score', lambda: db.save_score(*record))
+        if len(errors) == before:
+            saved.append(record)
+
+    return timings, errors, saved, start, time.time(), user_ids
+
+
+def verify(db_path, saved, user_ids):
+    """Compare the rows of the users this run created with every write the processes say succeeded
+    (anything else already in the database is ignored)"""
+    problems = []
+    db = Database(db_path)
+    with db.connection() as conn:
+        conn.execute("CREATE TEMP TABLE stress_users (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT INTO stress_users VALUES (?)", [(user_id,) for user_id in user_ids])
+        stored = conn.execute("SELECT user_id, score, level FROM scores "
+                              "WHERE user_id IN (SELECT id FROM stress_users)").fetchall()
+        best = dict(conn.execute("SELECT user_id, score FROM user_best "
+                                 "WHERE user_id IN (SELECT id FROM stress_users)").fetchall())
+        conn.execute("DROP TABLE stress_users")
+
+    if sorted(stored) != sorted(saved):
+        problems.append(f"{len(saved)} scores saved but {len(stored)} stored, or they differ")
+
+    expected_best = {}
+    for user_id, score, level in saved:
+        expected_best[user_id] = max(score, expected_best.get(user_id, score))
+    if best != expected_best:
+        problems.append("user_best does not match the saved scores")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer one database file from several processes")
+    parser.add_argument('-p', '--processes', type=int, default=8, help="concurrent game processes")
+    parser.add_argument('--users', type=int, default=5,
+                        help="users each process registers and logs in (each runs the password KDF twice)")
+    parser.add_argument('--scores', type=int, default=2000, help="scores each process saves")
+    parser.add_argument('--max-ms', type=float, default=1000,
+                        help="fail if any save_score takes longer than this")
+    parser.add_argument('--db', help="database path (default: a temporary file, recreated); "
+                                     "only the users this run creates are checked")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.gettempdir(), 'db_stress.db')
+    if not args.db:
+        remove_database(db_path)
+    Database(db_path)  # Create and migrate it once, like an installed game would
+    close_pools()
+
+    # Spawned, not forked, so no process inherits pooled connections
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager, context.Pool(args.processes) as pool:
+        barrier = manager.Barrier(args.processes)
+        run = int(time.time() * 1000)  # Keeps usernames unique when --db is reused
+        jobs = [(db_path, run, n, args.users, args.scores, barrier) for n in range(args.processes)]
+        reports = pool.starmap(stress_process, jobs)
+
+    elapsed = max(report[4] for report in reports) - min(report[3] for report in reports)
+    errors = [error for report in reports for error in report[1]]
+    saved = [record for report in reports for record in report[2]]
+    user_ids = [user_id for report in reports for user_id in report[5]]
+
+    print(f"{args.processes} processes, {elapsed:.2f}s")
+    worst_save = 0
+    for name in ('register_user', 'login_user', 'save_score'):
+        durations = [d for report in reports for d in report[0][name]]
+        if durations:
+            stats = summarize(durations, elapsed)
+            print(f"  {name}: {stats}")
+            if name == 'save_score':
+                worst_save = stats['max_ms']
+
+    problems = errors[:10] + verify(db_path, saved, user_ids)
+    if worst_save > args.max_ms:
+        problems.append(f"slowest save_score took {worst_save:.0f} ms (bound {args.max_ms:.0f} ms)")
+
+    if not args.db:
+        close_pools()
+        remove_database(db_path)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print(f"OK: all {len(saved)} scores and {args.processes * args.users} users written")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,19 +8,21 @@ from assets import get_assets
 
 
 class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width):
+    def __init__(self, x, y, width, height=PLATFORM_HEIGHT):
         super().__init__()
         # Load platform sprite and tile it
         assets = get_assets()
         if assets:
             sprite = assets.get_sprite('platform')
-            # Tile the platform sprite to match the width
-            self.image = pygame.Surface((width, PLATFORM_HEIGHT))
-            for i in range(0, width, sprite.get_width()):
-                tile = pygame.transform.scale(sprite, (min(sprite.get_width(), width - i), PLATFORM_HEIGHT))
-                self.image.blit(tile, (i, 0))
+            # Tile the platform sprite to match the width (rows of it for merged, taller platforms)
+            self.image = pygame.Surface((width, height))
+            for j in range(0, height, PLATFORM_HEIGHT):
+                for i in range(0, width, sprite.get_width()):
+                    tile = pygame.transform.scale(sprite, (min(sprite.get_width(), width - i),
+                                                           min(PLATFORM_HEIGHT, height - j)))
+                    self.image.blit(tile, (i, j))
         else:
-            self.image = pygame.Surface((width, PLATFORM_HEIGHT))
+            self.image = pygame.Surface((width, height))
             self.image.fill(GRAY)
 
         self.rect = self.image.get_rect()
@@ -43,11 +45,10 @@ class Coin(pygame.sprite.Sprite):
             # Try to load diamond animation first
             diamond_frames = assets.get_sprite('coin_diamond')
             if diamond_frames and isinstance(diamond_frames, list):
-                self.animations = diamond_frames
+                # Pre-scaled frames (manifest scales 18x14 up 2x for visibility)
+                self.animations = assets.get_frames('coin_diamond')
                 self.has_animations = True
-                # Set initial image from first frame (scaled up 2x for visibility)
-                frame = self.animations[0]
-                self.image = pygame.transform.scale(frame, (36, 28))  # 18x14 scaled 2x
+                self.image = self.animations[0]
             else:
                 # Fallback to static coin sprite
                 sprite = assets.get_sprite('coin')
@@ -75,9 +76,8 @@ class Coin(pygame.sprite.Sprite):
             self.animation_counter = 0
             self.animation_frame = (self.animation_frame + 1) % len(self.animations)
 
-        # Get current frame and scale it
-        frame = self.animations[int(self.animation_frame)]
-        self.image = pygame.transform.scale(frame, (36, 28))  # 18x14 scaled 2x
+        # Frames are already scaled by the asset cache
+        self.image = self.animations[int(self.animation_frame)]
 
 
 class Spike(pygame.sprite.Sprite):
@@ -101,6 +101,7 @@ class Enemy(pygame.sprite.Sprite):
         # Load enemy sprite with animation support
         assets = get_assets()
         self.animations = {}
+        self.flipped_animations = {}
         self.has_animations = False
         self.enemy_type = enemy_type
         self.current_animation = 'run'
@@ -112,16 +113,15 @@ class Enemy(pygame.sprite.Sprite):
                 run_frames = assets.get_sprite('enemy_cucumber_run')
 
                 if idle_frames and run_frames:
-                    self.animations['idle'] = idle_frames
-                    self.animations['run'] = run_frames
+                    self.load_cached_frames(assets, {'idle': 'enemy_cucumber_idle',
+                                                     'run': 'enemy_cucumber_run'})
                     self.has_animations = True
                     self.animation_frame = 0
                     self.animation_counter = 0
                     self.animation_speed = 0.2
 
                     # Set initial image from first run frame
-                    frame = self.animations['run'][0]
-                    self.image = pygame.transform.scale(frame, (ENEMY_WIDTH, ENEMY_HEIGHT))
+                    self.image = self.animations['run'][0]
                 else:
                     self.image = pygame.Surface((ENEMY_WIDTH, ENEMY_HEIGHT))
                     self.image.fill(RED)
@@ -131,15 +131,14 @@ class Enemy(pygame.sprite.Sprite):
                 frames = assets.get_sprite(slime_type)
 
                 if frames and isinstance(frames, list):
-                    self.animations['run'] = frames
+                    self.load_cached_frames(assets, {'run': slime_type})
                     self.has_animations = True
                     self.animation_frame = 0
                     self.animation_counter = 0
                     self.animation_speed = 0.15
 
                     # Set initial image from first frame
-                    frame = self.animations['run'][0]
-                    self.image = pygame.transform.scale(frame, (ENEMY_WIDTH, ENEMY_HEIGHT))
+                    self.image = self.animations['run'][0]
                 else:
                     # Try single sprite file
                     sprite = assets.get_sprite('enemy')
@@ -161,6 +160,13 @@ class Enemy(pygame.sprite.Sprite):
         self.direction = 1  # 1 for right, -1 for left
         self.speed = ENEMY_SPEED
 
+    def load_cached_frames(self, assets, sources):
+        """Fetch pre-scaled frames (both facings) for each animation from the asset cache"""
+        size = (ENEMY_WIDTH, ENEMY_HEIGHT)
+        for anim_name, sprite_name in sources.items():
+            self.animations[anim_name] = assets.get_frames(sprite_name, size)
+            self.flipped_animations[anim_name] = assets.get_frames(sprite_name, size, flipped=True)
+
     def update(self):
         """Update enemy movement with simple patrol AI"""
         self.rect.x += self.speed * self.direction
@@ -191,15 +197,10 @@ class Enemy(pygame.sprite.Sprite):
             self.animation_counter = 0
             self.animation_frame = (self.animation_frame + 1) % len(frames)
 
-        # Get current frame and scale it
-        frame = frames[int(self.animation_frame)]
-        scaled_frame = pygame.transform.scale(frame, (ENEMY_WIDTH, ENEMY_HEIGHT))
-
-        # Flip if moving left
+        # Use the cached mirrored frames if moving left
         if self.direction == -1:
-            scaled_frame = pygame.transform.flip(scaled_frame, True, False)
-
-        self.image = scaled_frame
+            frames = self.flipped_animations[self.current_animation]
+        self.image = frames[int(self.animation_frame)]
 
 
 class Boss(pygame.sprite.Sprite):
@@ -315,13 +316,13 @@ class Chest(pygame.sprite.Sprite):
             # Load idle animation (closed chest)
             idle = assets.get_sprite('chest_idle')
             if idle and isinstance(idle, list):
-                self.idle_frames = idle
+                self.idle_frames = assets.get_frames('chest_idle')
                 self.has_animations = True
 
             # Load open/unlocked animation
             open_anim = assets.get_sprite('chest_open')
             if open_anim and isinstance(open_anim, list):
-                self.open_frames = open_anim
+                self.open_frames = assets.get_frames('chest_open')
                 self.has_animations = True
 
         # Set initial image
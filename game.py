@@ -2,23 +2,31 @@
 Main game class with game loop and state management
 """
 import pygame
+import threading
+import time
 from config import *
 from player import Player
-from level import Level
-from database import Database
-from UI import Button
+from level import Level, LevelLoader
+from database import Database, get_score_writer
+from UI import Button, get_font, render_text, text_cache
+from assets import blit_batched, get_assets
+from renderer import DirtyRectRenderer
 
 
 class Game:
-    def __init__(self, screen, user_id, username):
+    def __init__(self, screen, user_id, username, input_source=None):
+        """input_source drives a headless game: called with the game every tick, it returns
+        the actions to take ('left', 'right', 'jump'). screen may then be None to never draw."""
         self.screen = screen
         self.user_id = user_id
         self.username = username
-        self.db = Database()
+        self.input_source = input_source
+        self.headless = input_source is not None
+        self.db = None if self.headless else Database()  # Simulated games aren't recorded
         
         # Fonts
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
+        self.font = get_font(36)
+        self.small_font = get_font(24)
         
         # Game state
         self.current_level = 1
@@ -26,13 +34,27 @@ class Game:
         self.running = True
         self.game_over = False
         self.game_won = False
+        self.result_surface = None  # Game over / victory screen, composited once
+        self.new_high_score = False
+        self.result_token = None  # Identifies the result screen a high score lookup belongs to
+        self.level_loader = None  # Builds the next level in the background
+        self.loading_level = False  # Waiting for the next level to finish loading
+        self.started_at = pygame.time.get_ticks()  # Start of the run the saved session covers
         
         # Initialize player and level
         self.player = Player(100, SCREEN_HEIGHT - 150)
-        self.level = Level(self.current_level)
+        self.set_level(Level(self.current_level))
         
-        # Clock
+        # Optional renderer that only redraws what changed each frame
+        self.renderer = DirtyRectRenderer(screen) if DIRTY_RECT_RENDERING and not self.headless else None
+
+        # Clock; the simulation advances in fixed steps, drawing interpolates between them
         self.clock = pygame.time.Clock()
+        self.step_time = 1 / SIMULATION_RATE
+        self.accumulator = 0.0  # Real time not yet simulated
+        self.frame_started = None  # When the current frame's time started counting
+        self.alpha = 1.0  # How far drawing is between the previous tick and the latest one
+        self.player_previous = None  # Player position before the latest tick
     
     def handle_events(self):
         """Handle game events"""
@@ -60,11 +82,48 @@ class Game:
         self.score = 0
         self.game_over = False
         self.game_won = False
+        self.result_surface = None
+        self.result_token = None
+        self.loading_level = False
+        self.started_at = pygame.time.get_ticks()
         self.player = Player(100, SCREEN_HEIGHT - 150)
-        self.level = Level(self.current_level)
+        self.player_previous = None
+        self.set_level(Level(self.current_level))
+
+    def set_level(self, level):
+        """Make a level current and start preparing the one after it"""
+        self.level = level
+
+        # Keep the active level's assets in memory
+        assets = get_assets()
+        if assets:
+            assets.pin(level.working_set)
+
+        next_number = level.level_number + 1
+        if next_number <= NUM_LEVELS:
+            # Reuse a loader that is already building the right level (e.g. after restart)
+            if not self.level_loader or self.level_loader.level_number != next_number:
+                self.level_loader = LevelLoader(next_number)
+            elif assets and self.level_loader.level:
+                # Already built: the pins above replaced the ones it set for itself
+                assets.pin(self.level_loader.level.working_set, keep_pinned=True)
+        else:
+            self.level_loader = None
     
     def handle_input(self):
         """Handle continuous input"""
+        if self.input_source:
+            actions = self.input_source(self)
+            if 'left' in actions:
+                self.player.move_left()
+            elif 'right' in actions:
+                self.player.move_right()
+            else:
+                self.player.stop()
+            if 'jump' in actions:
+                self.player.jump()
+            return
+
         keys = pygame.key.get_pressed()
         
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
@@ -78,9 +137,15 @@ class Game:
         """Update game state"""
         if self.game_over or self.game_won:
             return
+
+        # Wait for the next level to finish loading before simulating anything
+        if self.loading_level:
+            if self.level_loader.is_done():
+                self.finish_level_transition()
+            return
         
         # Update player
-        self.player.update(self.level.platforms)
+        self.player.update(self.level.platform_grid)
         
         # Update level
         self.level.update(self.player)
@@ -95,7 +160,7 @@ class Game:
         if spikes_hit:
             if self.player.take_damage():
                 if self.player.lives <= 0:
-                    self.game_over = True
+                    self.end_game(won=False)
                 else:
                     self.player.reset_position(100, SCREEN_HEIGHT - 150)
 
@@ -113,7 +178,7 @@ class Game:
                 # Enemy damages player
                 if self.player.take_damage():
                     if self.player.lives <= 0:
-                        self.game_over = True
+                        self.end_game(won=False)
                     else:
                         self.player.reset_position(100, SCREEN_HEIGHT - 150)
                 break  # Only take damage once per frame
@@ -124,7 +189,7 @@ class Game:
             if self.player.rect.colliderect(self.level.boss.rect):
                 if self.player.take_damage():
                     if self.player.lives <= 0:
-                        self.game_over = True
+                        self.end_game(won=False)
                     else:
                         self.player.reset_position(100, SCREEN_HEIGHT - 150)
             
@@ -133,7 +198,7 @@ class Game:
             if projectiles_hit:
                 if self.player.take_damage():
                     if self.player.lives <= 0:
-                        self.game_over = True
+                        self.end_game(won=False)
                     else:
                         self.player.reset_position(100, SCREEN_HEIGHT - 150)
             
@@ -146,7 +211,7 @@ class Game:
 
                 if self.level.boss.take_damage():
                     self.score += POINTS_PER_BOSS
-                    self.game_won = True
+                    self.end_game(won=True)
                 else:
                     self.score += 50
 
@@ -156,7 +221,7 @@ class Game:
         if self.player.rect.top > SCREEN_HEIGHT:
             if self.player.take_damage():
                 if self.player.lives <= 0:
-                    self.game_over = True
+                    self.end_game(won=False)
                 else:
                     self.player.reset_position(100, SCREEN_HEIGHT - 150)
         
@@ -174,72 +239,185 @@ class Game:
             if not self.level.boss and len(self.level.coins) == 0:
                 self.next_level()
     
+    def step(self):
+        """Advance the game by one fixed simulation tick"""
+        self.player_previous = self.player.rect.topleft
+        if not self.game_over and not self.game_won:
+            self.handle_input()
+            self.update()
+
+    def advance(self):
+        """Run as many fixed ticks as the real time since the last frame covers"""
+        now = time.perf_counter()
+        if self.frame_started is not None:
+            self.accumulator += min(now - self.frame_started, MAX_FRAME_TIME)
+        self.frame_started = now
+
+        while self.accumulator >= self.step_time and self.running:
+            self.step()
+            self.accumulator -= self.step_time
+        self.alpha = self.accumulator / self.step_time
+
+    def interpolated_rect(self, rect, previous):
+        """Where to draw a sprite that moved from previous to rect during the latest tick"""
+        if previous is None:
+            return rect
+        dx = rect.x - previous[0]
+        dy = rect.y - previous[1]
+        if abs(dx) > INTERPOLATION_SNAP_DISTANCE or abs(dy) > INTERPOLATION_SNAP_DISTANCE:
+            return rect
+        # alpha is the time since the latest tick, so ease from the previous position to it
+        return rect.move(round(dx * (self.alpha - 1)), round(dy * (self.alpha - 1)))
+
     def next_level(self):
         """Load the next level"""
         self.current_level += 1
         
         if self.current_level > NUM_LEVELS:
-            self.game_won = True
+            self.end_game(won=True)
+        elif self.level_loader and not self.level_loader.is_done() and not self.headless:
+            # Still building in the background: show the loading screen until it's ready
+            # (simulated games wait for it instead, so every run takes the same ticks)
+            self.loading_level = True
+        else:
+            self.finish_level_transition()
+
+    def finish_level_transition(self):
+        """Swap in the preloaded level and reset the player"""
+        self.loading_level = False
+        if self.level_loader and self.level_loader.level_number == self.current_level:
+            level = self.level_loader.get_level()
         else:
-            self.level = Level(self.current_level)
-            self.player.reset_position(100, SCREEN_HEIGHT - 150)
-            self.player.lives = min(self.player.lives + 1, STARTING_LIVES)  # Bonus life
+            level = Level(self.current_level)
+        self.level_loader = None
+        self.set_level(level)
+        self.player.reset_position(100, SCREEN_HEIGHT - 150)
+        self.player.lives = min(self.player.lives + 1, STARTING_LIVES)  # Bonus life
     
     def draw(self):
         """Draw everything"""
-        # Draw background based on current level
-        from assets import get_assets
-        assets = get_assets()
-        if assets:
-            bg = assets.get_background(f'level{self.current_level}')
-            if bg:
-                # Center the background (1280x960) on the screen (800x600)
-                # Apply horizontal offset from config
-                bg_x = -(bg.get_width() - SCREEN_WIDTH) // 2 + BG_HORIZONTAL_OFFSET
-                bg_y = -(bg.get_height() - SCREEN_HEIGHT) // 2
-                self.screen.blit(bg, (bg_x, bg_y))
+        if self.loading_level:
+            self.draw_loading_screen()
+            return
+
+        # Game over / win screen
+        if self.game_over or self.game_won:
+            self.draw_result_screen()
+            return
+
+        self.draw_scene()
+
+    def draw_scene(self):
+        """Draw the level, sprites and HUD"""
+        # Draw the level's pre-composited background and tile layers
+        self.screen.blit(self.level.static_surface, (0, 0))
+
+        # Draw level
+        self.level.draw(self.screen)
+
+        # Draw sprites and HUD
+        self.draw_sprites()
+        self.draw_hud()
+
+    def end_game(self, won):
+        """Enter the game over or victory state"""
+        if won:
+            self.game_won = True
+        else:
+            self.game_over = True
+
+        # The result screen is composited on its next draw
+        self.result_surface = None
+        self.new_high_score = False
+        self.result_token = object()
+
+        if won and self.db:
+            # Look up the previous best once, off the render thread
+            threading.Thread(target=self.check_high_score, args=(self.result_token, self.score),
+                             daemon=True).start()
+
+    def check_high_score(self, token, score):
+        """Worker thread: flag a new high score for the result screen it was started for"""
+        user_high = self.db.get_user_high_score(self.user_id)
+        if token is self.result_token and score > user_high:
+            self.new_high_score = True
+
+    def draw_result_screen(self):
+        """Draw the game over / victory screen from a surface composited once"""
+        if self.result_surface is None:
+            # The game is frozen now, so the last frame plus overlay never changes
+            self.draw_scene()
+            if self.game_over:
+                self.draw_game_over()
             else:
-                self.screen.fill((135, 206, 235))  # Sky blue background fallback
+                self.draw_game_won()
+            self.result_surface = self.screen.copy()
         else:
-            self.screen.fill((135, 206, 235))  # Sky blue background fallback
+            self.screen.blit(self.result_surface, (0, 0))
 
-        # Draw level
+        if self.new_high_score:
+            high_score_text = render_text(self.small_font, "NEW HIGH SCORE!", YELLOW)
+            high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 40))
+            self.screen.blit(high_score_text, high_score_rect)
+    
+    def draw_dirty(self):
+        """Draw only the changed regions and update just those on the display"""
+        if self.loading_level or self.game_over or self.game_won:
+            # Full-screen overlays: fall back to a normal redraw
+            self.renderer.invalidate()
+            self.draw()
+            pygame.display.flip()
+            return
+
+        self.renderer.restore(self.level.static_surface)
         self.level.draw(self.screen)
+        drawn_rects = self.draw_sprites() + self.draw_hud()
+        self.renderer.present(drawn_rects)
 
-        # Draw chest if exists
+    def draw_sprites(self):
+        """Draw visible sprites (chest, then player) in one batched blit and return their rects"""
+        sprites = []
         if self.level.chest:
-            self.screen.blit(self.level.chest.image, self.level.chest.rect)
+            sprites.append((self.level.chest.image, self.level.chest.rect))
+        if self.player.is_visible():
+            sprites.append((self.player.image, self.interpolated_rect(self.player.rect, self.player_previous)))
+        return blit_batched(self.screen, sprites)
 
-        # Draw player
-        self.player.draw(self.screen)
-        
-        # Draw HUD
-        self.draw_hud()
-        
-        # Draw game over or win screen
-        if self.game_over:
-            self.draw_game_over()
-        elif self.game_won:
-            self.draw_game_won()
-    
     def draw_hud(self):
-        """Draw the heads-up display"""
-        # Score
-        score_text = self.font.render(f"Score: {self.score}", True, BLACK)
-        self.screen.blit(score_text, (10, 10))
+        """Draw the heads-up display and return the rects it covers"""
+        # Score, lives and level are drawn from cached digit glyphs
+        score_rect = text_cache.draw_number(self.screen, self.font, "Score: ", self.score, BLACK, (10, 10))
         
         # Lives
-        lives_text = self.font.render(f"Lives: {self.player.lives}", True, BLACK)
-        self.screen.blit(lives_text, (10, 50))
+        lives_rect = text_cache.draw_number(self.screen, self.font, "Lives: ", self.player.lives, BLACK, (10, 50))
         
         # Level
-        level_text = self.font.render(f"Level: {self.current_level}", True, BLACK)
-        self.screen.blit(level_text, (SCREEN_WIDTH - 150, 10))
+        level_rect = text_cache.draw_number(self.screen, self.font, "Level: ", self.current_level, BLACK,
+                                            (SCREEN_WIDTH - 150, 10))
         
         # Username
-        user_text = self.small_font.render(f"Player: {self.username}", True, BLACK)
-        self.screen.blit(user_text, (SCREEN_WIDTH - 200, 50))
+        user_text = render_text(self.small_font, f"Player: {self.username}", BLACK)
+        user_rect = self.screen.blit(user_text, (SCREEN_WIDTH - 200, 50))
+
+        return [score_rect, lives_rect, level_rect, user_rect]
     
+    def draw_loading_screen(self):
+        """Draw a loading indicator while the next level finishes building"""
+        self.screen.fill(BLACK)
+
+        loading_text = render_text(self.font, f"Loading level {self.current_level}...", WHITE)
+        loading_rect = loading_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
+        self.screen.blit(loading_text, loading_rect)
+
+        # Progress bar
+        bar_width = 300
+        bar_height = 20
+        bar_x = SCREEN_WIDTH // 2 - bar_width // 2
+        bar_y = SCREEN_HEIGHT // 2 + 10
+        progress_width = int(self.level_loader.progress * bar_width)
+        pygame.draw.rect(self.screen, GREEN, (bar_x, bar_y, progress_width, bar_height))
+        pygame.draw.rect(self.screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
+
     def draw_game_over(self):
         """Draw game over screen"""
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -248,17 +426,17 @@ class Game:
         self.screen.blit(overlay, (0, 0))
         
         # Game over text
-        game_over_text = self.font.render("GAME OVER", True, RED)
+        game_over_text = render_text(self.font, "GAME OVER", RED)
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(game_over_text, game_over_rect)
         
         # Final score
-        score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = render_text(self.font, f"Final Score: {self.score}", WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.screen.blit(score_text, score_rect)
         
         # Instructions
-        instruction_text = self.small_font.render("Press R to restart or ESC to exit", True, WHITE)
+        instruction_text = render_text(self.small_font, "Press R to restart or ESC to exit", WHITE)
         instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
         self.screen.blit(instruction_text, instruction_rect)
     
@@ -270,24 +448,19 @@ class Game:
         self.screen.blit(overlay, (0, 0))
         
         # Victory text
-        victory_text = self.font.render("VICTORY!", True, GREEN)
+        victory_text = render_text(self.font, "VICTORY!", GREEN)
         victory_rect = victory_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(victory_text, victory_rect)
         
         # Final score
-        score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = render_text(self.font, f"Final Score: {self.score}", WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         self.screen.blit(score_text, score_rect)
         
-        # Check for high score
-        user_high = self.db.get_user_high_score(self.user_id)
-        if self.score > user_high:
-            high_score_text = self.small_font.render("NEW HIGH SCORE!", True, YELLOW)
-            high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 40))
-            self.screen.blit(high_score_text, high_score_rect)
-        
+        # "NEW HIGH SCORE!" is added by draw_result_screen once the lookup finishes
+
         # Instructions
-        instruction_text = self.small_font.render("Press R to restart or ESC to exit", True, WHITE)
+        instruction_text = render_text(self.small_font, "Press R to restart or ESC to exit", WHITE)
         instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
         self.screen.blit(instruction_text, instruction_rect)
     
@@ -322,7 +495,7 @@ class Game:
             self.screen.blit(overlay, (0, 0))
             
             # Draw pause text
-            pause_text = self.font.render("PAUSED", True, WHITE)
+            pause_text = render_text(self.font, "PAUSED", WHITE)
             pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, 150))
             self.screen.blit(pause_text, pause_rect)
             
@@ -332,19 +505,64 @@ class Game:
             
             pygame.display.flip()
             self.clock.tick(FPS)
+
+        # The menu drew over the whole screen
+        if self.renderer:
+            self.renderer.invalidate()
+
+        # Time spent paused isn't simulated
+        self.frame_started = None
     
+    def simulate(self, max_ticks, render_every=0):
+        """
+        Headless loop: run fixed ticks as fast as possible until the game ends or
+        max_ticks pass, drawing every render_every ticks (0 = never; needs a screen).
+        Returns: dict with tick count, simulation and drawing time, and the outcome
+        """
+        ticks = 0
+        frames = 0
+        simulate_time = 0.0
+        draw_time = 0.0
+
+        while ticks < max_ticks and not (self.game_over or self.game_won):
+            started = time.perf_counter()
+            self.step()
+            simulate_time += time.perf_counter() - started
+            ticks += 1
+
+            if render_every and ticks % render_every == 0:
+                started = time.perf_counter()
+                self.draw()
+                draw_time += time.perf_counter() - started
+                frames += 1
+
+        return {
+            'ticks': ticks,
+            'ticks_per_second': ticks / simulate_time if simulate_time else 0.0,
+            'simulate_seconds': simulate_time,
+            'frames': frames,
+            'draw_ms': draw_time / frames * 1000 if frames else 0.0,
+            'level': self.current_level,
+            'score': self.score,
+            'lives': self.player.lives,
+            'result': 'won' if self.game_won else 'lost' if self.game_over else 'running'
+        }
+
     def run(self):
         """Main game loop"""
         while self.running:
             self.handle_events()
+            self.advance()
 
-            if not self.game_over and not self.game_won:
-                self.handle_input()
-                self.update()
-
-            self.draw()
-            pygame.display.flip()
+            if self.renderer:
+                self.draw_dirty()
+            else:
+                self.draw()
+                pygame.display.flip()
             self.clock.tick(FPS)
         
-        # Save score to database
-        self.db.save_score(self.user_id, self.score, self.current_level)
\ No newline at end of file
+        # Queue the score and session; the writer commits them off the UI thread
+        writer = get_score_writer()
+        writer.submit_score(self.user_id, self.score, self.current_level)
+        duration = (pygame.time.get_ticks() - self.started_at) / 1000
+        writer.submit_session(self.user_id, self.score, self.current_level, self.game_won, duration)
\ No newline at end of file
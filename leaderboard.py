@@ -0,0 +1,301 @@
+"""
+Leaderboard screen: scroll through every player's best score
+"""
+import pygame
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import *
+from UI import Button, get_font, render_text
+from database import Database
+
+
+class LeaderboardFetcher:
+    """Runs leaderboard queries on a worker thread so the screen never waits on SQLite"""
+
+    def __init__(self, db):
+        self.db = db
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request(self, kind, *args):
+        """Queue a query: ('count',), ('position', user_id), ('around', user_id)
+        or ('page', anchor, cursor, backwards)"""
+        self.requests.put((kind, args))
+
+    def run(self):
+        """Worker thread: answer requests in order until closed"""
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+
+            kind, args = item
+            try:
+                if kind == 'count':
+                    result = self.db.get_player_count()
+                elif kind == 'position':
+                    result = self.db.get_user_position(args[0])
+                elif kind == 'around':
+                    result = self.db.get_users_around(args[0], LEADERBOARD_PAGE_SIZE // 2)
+                else:
+                    anchor, cursor, backwards = args
+                    result = self.db.get_leaderboard_page(cursor, LEADERBOARD_PAGE_SIZE, backwards)
+            except sqlite3.Error as e:
+                print(f"Could not load leaderboard: {e}")
+                result = None
+            self.results.put((kind, args, result))
+
+    def poll(self):
+        """Finished requests as (kind, args, result), without blocking"""
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def close(self):
+        """Stop the worker once it finishes the current query"""
+        self.requests.put(None)
+
+
+class LeaderboardScreen:
+    def __init__(self, screen, user_id=None):
+        self.screen = screen
+        self.user_id = user_id
+        self.fetcher = LeaderboardFetcher(Database())
+
+        # Fonts
+        self.title_font = get_font(56)
+        self.font = get_font(36)
+        self.small_font = get_font(24)
+
+        # List area
+        self.list_rect = pygame.Rect(100, 130, SCREEN_WIDTH - 200, 360)
+        self.visible_rows = self.list_rect.height // LEADERBOARD_ROW_HEIGHT
+
+        # UI Components
+        center_x = SCREEN_WIDTH // 2
+        self.back_button = Button(center_x - 210, 510, 200, 50, "Back", RED)
+        self.me_button = Button(center_x + 10, 510, 200, 50, "Find Me", GREEN) if user_id else None
+
+        # Loaded rows by leaderboard position (1 = best), filled in page by page
+        self.rows = {}
+        self.row_surfaces = OrderedDict()  # position -> rendered row, LRU
+        self.total = None  # Number of players, once counted
+        self.position = None  # The user's row in the list, once looked up
+        self.top = 1  # Position shown in the first visible row
+        self.fetching = False  # A page request is in flight
+        self.retry_delay = 0  # Wait after the last failed page request (0 = none failed)
+        self.retry_at = 0  # time.monotonic() before which no page is requested
+        self.exhausted = set()  # (anchor, backwards) of pages that came back short or empty
+        self.running = True
+
+        self.fetcher.request('count')
+        if user_id:
+            self.fetcher.request('position', user_id)
+
+    def scroll_to(self, top):
+        """Move the view, keeping it inside the list"""
+        last_top = max(1, (self.total or 1) - self.visible_rows + 1)
+        self.top = max(1, min(int(top), last_top))
+
+    def handle_events(self, events):
+        """Handle leaderboard events"""
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+                return "quit"
+
+            if self.back_button.handle_event(event):
+                self.running = False
+                return "back"
+
+            if self.me_button and self.me_button.handle_event(event):
+                self.fetcher.request('around', self.user_id)
+
+            if event.type == pygame.MOUSEWHEEL:
+                self.scroll_to(self.top - event.y * 3)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                    return "back"
+                elif event.key == pygame.K_UP:
+                    self.scroll_to(self.top - 1)
+                elif event.key == pygame.K_DOWN:
+                    self.scroll_to(self.top + 1)
+                elif event.key == pygame.K_PAGEUP:
+                    self.scroll_to(self.top - self.visible_rows)
+                elif event.key == pygame.K_PAGEDOWN:
+                    self.scroll_to(self.top + self.visible_rows)
+                elif event.key == pygame.K_HOME:
+                    self.scroll_to(1)
+                elif event.key == pygame.K_END and self.total:
+                    self.scroll_to(self.total)
+
+        return None
+
+    def receive(self):
+        """Merge finished queries into the loaded rows"""
+        for kind, args, result in self.fetcher.poll():
+            if kind == 'page':
+                self.fetching = False
+                if result is None:
+                    self.page_failed()
+                else:
+                    self.retry_delay = 0
+            if result is None:
+                continue
+
+            if kind == 'count':
+                self.total = result
+                self.scroll_to(self.top)
+            elif kind == 'position':
+                self.position = result
+            elif kind == 'around':
+                first, rows = result
+                if first is not None:
+                    self.add_rows(first, rows)
+                    self.scroll_to(first + len(rows) // 2 - self.visible_rows // 2)
+            else:
+                anchor, cursor, backwards = args
+                self.add_rows(anchor - len(result) if backwards else anchor + 1, result)
+                if len(result) < LEADERBOARD_PAGE_SIZE:
+                    # Nothing more that way; the count may be stale, so stop asking
+                    self.exhausted.add((anchor, backwards))
+                    if not backwards:
+                        self.total = min(self.total, anchor + len(result))
+                        self.scroll_to(self.top)
+
+    def page_failed(self):
+        """Back off before the next page request, doubling the wait each time"""
+        self.retry_delay = min(max(self.retry_delay * 2, LEADERBOARD_RETRY_DELAY), LEADERBOARD_RETRY_MAX)
+        self.retry_at = time.monotonic() + self.retry_delay
+
+    def add_rows(self, first, rows):
+        """Store consecutive rows starting at a position, replacing stale renders"""
+        for position, row in enumerate(rows, first):
+            if self.rows.get(position) != row:
+                self.rows[position] = row
+                self.row_surfaces.pop(position, None)
+
+    def request_missing_rows(self):
+        """Ask for the next page the view (plus a page of margin) still needs"""
+        if self.fetching or self.total is None or time.monotonic() < self.retry_at:
+            return
+
+        start = max(1, self.top - LEADERBOARD_PAGE_SIZE)
+        end = min(self.total, self.top + self.visible_rows + LEADERBOARD_PAGE_SIZE)
+        for position in range(start, end + 1):
+            if position in self.rows:
+                continue
+
+            # Page from the nearest loaded neighbour, or from either end of the list
+            if position == 1:
+                anchor, cursor, backwards = 0, None, False
+            elif position - 1 in self.rows:
+                user_id, _, score = self.rows[position - 1]
+                anchor, cursor, backwards = position - 1, (score, user_id), False
+            elif position + 1 in self.rows:
+                user_id, _, score = self.rows[position + 1]
+                anchor, cursor, backwards = position + 1, (score, user_id), True
+            elif position >= self.total - LEADERBOARD_PAGE_SIZE:
+                anchor, cursor, backwards = self.total + 1, None, True
+            else:
+                continue
+            if (anchor, backwards) in self.exhausted:
+                continue
+            self.fetcher.request('page', anchor, cursor, backwards)
+            self.fetching = True
+            return
+
+    def get_row_surface(self, position):
+        """Render a leaderboard row once and reuse it while it stays in the cache"""
+        surface = self.row_surfaces.get(position)
+        if surface is not None:
+            self.row_surfaces.move_to_end(position)
+            return surface
+
+        user_id, username, score = self.rows[position]
+        surface = pygame.Surface((self.list_rect.width, LEADERBOARD_ROW_HEIGHT))
+        if user_id == self.user_id:
+            surface.fill(YELLOW)
+        else:
+            surface.fill(WHITE if position % 2 else (235, 235, 235))
+
+        rank_text = render_text(self.small_font, f"{position}.", BLACK)
+        name_text = render_text(self.small_font, username, BLACK)
+        score_text = render_text(self.small_font, str(score), BLACK)
+        y = (LEADERBOARD_ROW_HEIGHT - rank_text.get_height()) // 2
+        surface.blit(rank_text, (10, y))
+        surface.blit(name_text, (100, y))
+        surface.blit(score_text, (self.list_rect.width - 10 - score_text.get_width(), y))
+
+        self.row_surfaces[position] = surface
+        if len(self.row_surfaces) > LEADERBOARD_ROW_CACHE:
+            self.row_surfaces.popitem(last=False)
+        return surface
+
+    def draw(self):
+        """Draw the leaderboard screen"""
+        self.screen.fill(WHITE)
+
+        # Title
+        title = render_text(self.title_font, "Leaderboard", BLUE)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 50))
+        self.screen.blit(title, title_rect)
+
+        # Player count and the user's rank
+        if self.total is None:
+            summary = "Loading..."
+        else:
+            summary = f"{self.total} players"
+            if self.position:
+                summary += f"  -  Your rank: {self.position}"
+        summary_text = render_text(self.small_font, summary, BLACK)
+        summary_rect = summary_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
+        self.screen.blit(summary_text, summary_rect)
+
+        # Rows; ones still loading show as placeholders
+        for i in range(self.visible_rows):
+            position = self.top + i
+            if self.total is not None and position > self.total:
+                break
+            y = self.list_rect.y + i * LEADERBOARD_ROW_HEIGHT
+            if position in self.rows:
+                self.screen.blit(self.get_row_surface(position), (self.list_rect.x, y))
+            else:
+                loading = render_text(self.small_font, f"{position}.  ...", GRAY)
+                self.screen.blit(loading, (self.list_rect.x + 10, y + 5))
+        pygame.draw.rect(self.screen, GRAY, self.list_rect, 2)
+
+        # Buttons
+        self.back_button.draw(self.screen, self.font)
+        if self.me_button:
+            self.me_button.draw(self.screen, self.font)
+
+    def run(self):
+        """Main leaderboard loop. Returns "back" or "quit" """
+        clock = pygame.time.Clock()
+        repeat = pygame.key.get_repeat()
+        pygame.key.set_repeat(300, 40)  # Hold the arrow keys to scroll
+
+        result = None
+        while self.running:
+            result = self.handle_events(pygame.event.get())
+
+            self.receive()
+            self.request_missing_rows()
+            self.draw()
+
+            pygame.display.flip()
+            clock.tick(FPS)
+
+        pygame.key.set_repeat(*repeat)
+        self.fetcher.close()
+        return result
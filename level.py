@@ -2,17 +2,44 @@
 Level layouts and configurations for the platform game
 """
 import pygame
+import threading
 from config import *
 from entities import Platform, Enemy, Coin, Boss, Spike, Chest
-from tiled_loader import load_level_from_tiled
+from tiled_loader import load_level_from_tiled, level_map_path
+from assets import get_assets
+from collision import SpatialHash, merge_platforms
+
+
+class LoadProgress:
+    """Turns the build stages' progress into one 0-1 fraction for the loading bar"""
+
+    # Rough share of a level build each stage takes, in build order (timed on level 2, cold cache)
+    STAGE_SHARES = {'map': 0.45, 'colliders': 0.05, 'entities': 0.2, 'grid': 0.05, 'surface': 0.25}
+
+    def __init__(self, on_progress, stages):
+        self.on_progress = on_progress
+        total = sum(self.STAGE_SHARES[stage] for stage in stages)
+        self.spans = {}  # stage -> (start, share) of the whole build
+        start = 0.0
+        for stage in stages:
+            share = self.STAGE_SHARES[stage] / total
+            self.spans[stage] = (start, share)
+            start += share
+
+    def report(self, stage, done=1, total=1):
+        """Report that done of the stage's total work items are finished"""
+        if self.on_progress:
+            start, share = self.spans[stage]
+            self.on_progress(min(1.0, start + share * (done / total if total else 1.0)))
 
 
 class Level:
     """Represents a game level with platforms, enemies, and collectibles"""
 
-    def __init__(self, level_number):
+    def __init__(self, level_number, on_progress=None):
         self.level_number = level_number
         self.platforms = []
+        self.platform_grid = None  # Spatial index or solid tile grid, for player collisions
         self.enemies = pygame.sprite.Group()
         self.coins = pygame.sprite.Group()
         self.spikes = pygame.sprite.Group()  # Add spikes group
@@ -20,9 +47,22 @@ class Level:
         self.chest = None  # Add chest
         self.tiled_loader = None
         self.player_spawn = None
+        self.working_set = set()
+        self.static_surface = None  # Background + decorative tile layers, composited once
+
+        # Levels without a Tiled map skip the parse and tile stages
+        if level_map_path(level_number):
+            progress = LoadProgress(on_progress, ['map', 'colliders', 'entities', 'grid', 'surface'])
+        else:
+            progress = LoadProgress(on_progress, ['entities', 'grid', 'surface'])
+
+        # Record every asset the level touches so it can be pinned in the cache
+        assets = get_assets()
+        if assets:
+            assets.begin_working_set()
 
         # Try to load from Tiled first
-        tiled_data = load_level_from_tiled(level_number)
+        tiled_data = load_level_from_tiled(level_number, progress.report)
         if tiled_data:
             print(f"Loading level {level_number} from Tiled map")
             self.platforms = tiled_data['platforms']
@@ -41,6 +81,52 @@ class Level:
                 self.load_level_2()
             elif level_number == 3:
                 self.load_level_3()
+            progress.report('entities')
+
+        if assets:
+            self.working_set = assets.end_working_set()
+
+        if self.tiled_loader and len(self.tiled_loader.collision_grid):
+            # Tile maps collide straight against the solid tiles under the player
+            self.platform_grid = self.tiled_loader.collision_grid
+            print(f"Level {level_number} colliders: {len(self.platform_grid)} solid tiles")
+        else:
+            # Platforms never move: merge touching ones and index them once
+            collider_count = len(self.platforms)
+            self.platforms = merge_platforms(self.platforms)
+            print(f"Level {level_number} colliders: {collider_count} -> {len(self.platforms)}")
+            self.platform_grid = SpatialHash.from_platforms(self.platforms)
+        progress.report('grid')
+
+        # Built after recording: the composited surface replaces the background image
+        self.build_static_surface(lambda done, total: progress.report('surface', done, total))
+
+    def build_static_surface(self, on_progress=None):
+        """Composite the visible part of the background and the non-collision tile layers.
+        on_progress(done, total) is called after the background and after each layer."""
+        layers = self.tiled_loader.background_layers() if self.tiled_loader else []
+        surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        surface.fill((135, 206, 235))  # Sky blue background fallback
+
+        assets = get_assets()
+        bg = assets.get_background(f'level{self.level_number}') if assets else None
+        if bg:
+            # Center the background (e.g. 1280x960) on the screen (800x600)
+            # Apply horizontal offset from config
+            bg_x = -(bg.get_width() - SCREEN_WIDTH) // 2 + BG_HORIZONTAL_OFFSET
+            bg_y = -(bg.get_height() - SCREEN_HEIGHT) // 2
+            surface.blit(bg, (bg_x, bg_y))
+        if on_progress:
+            on_progress(1, 1 + len(layers))
+
+        for done, layer in enumerate(layers, 2):
+            # Same horizontal shift as the platforms built from the map
+            self.tiled_loader.render_layer(surface, layer, (PLATFORM_HORIZONTAL_OFFSET, 0))
+            if on_progress:
+                on_progress(done, 1 + len(layers))
+
+        # Plain surfaces match the display format, so drawing this is a single opaque copy
+        self.static_surface = surface
 
     def update(self, player):
         """Update level entities"""
@@ -155,4 +241,39 @@ class Level:
 
         # Boss - positioned lower on the ground for easier access
         # Boss will patrol the ground level
-        self.boss = Boss(SCREEN_WIDTH // 2 - BOSS_WIDTH // 2, SCREEN_HEIGHT - 50 - BOSS_HEIGHT)
\ No newline at end of file
+        self.boss = Boss(SCREEN_WIDTH // 2 - BOSS_WIDTH // 2, SCREEN_HEIGHT - 50 - BOSS_HEIGHT)
+
+
+class LevelLoader:
+    """Builds a Level on a background thread so level transitions don't freeze the game"""
+
+    def __init__(self, level_number):
+        self.level_number = level_number
+        self.level = None
+        self.progress = 0.0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Worker thread: build the level and report progress"""
+        try:
+            self.level = Level(self.level_number, on_progress=self.set_progress)
+            # Its prepared frames must stay cached (and in the atlas) until the level is current
+            assets = get_assets()
+            if assets:
+                assets.pin(self.level.working_set, keep_pinned=True)
+        except Exception as e:
+            print(f"Error preloading level {self.level_number}: {e}")
+        self.progress = 1.0
+
+    def set_progress(self, progress):
+        self.progress = progress
+
+    def is_done(self):
+        """True once the worker has finished (successfully or not)"""
+        return not self.thread.is_alive()
+
+    def get_level(self):
+        """Return the finished level, building it here if preloading failed"""
+        self.thread.join()
+        return self.level or Level(self.level_number)
@@ -1,21 +1,26 @@
 """
 Login and registration screen
 """
+import math
 import pygame
+import sqlite3
+import threading
 from config import *
-from UI import Button, InputBox, MessageBox
-from database import Database
+from UI import Button, InputBox, MessageBox, get_font, render_text
+from database import Database, get_stats_cache
+from leaderboard import LeaderboardScreen
 
 
 class LoginScreen:
     def __init__(self, screen):
         self.screen = screen
         self.db = Database()
+        self.stats = get_stats_cache()
         
         # Fonts
-        self.title_font = pygame.font.Font(None, 72)
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
+        self.title_font = get_font(72)
+        self.font = get_font(36)
+        self.small_font = get_font(24)
         
         # UI Components
         center_x = SCREEN_WIDTH // 2
@@ -26,11 +31,15 @@ class LoginScreen:
         self.login_button = Button(center_x - 100, 330, 200, 50, "Login")
         self.register_button = Button(center_x - 100, 390, 200, 50, "Register", GREEN)
         self.exit_button = Button(center_x - 100, 450, 200, 50, "Exit", RED)
+        self.start_button = Button(center_x - 100, 350, 200, 50, "Start Game", GREEN)
+        self.leaderboard_button = Button(SCREEN_WIDTH - 190, 10, 180, 40, "Leaderboard")
         
         self.message_box = MessageBox(center_x - 150, 520, 300, 40)
         
         self.current_user_id = None
         self.current_username = None
+        self.auth_pending = False  # A login or registration is running on a worker thread
+        self.auth_result = None  # (action, username, result) handed back by the worker
         self.running = True
     
     def handle_events(self, events):
@@ -42,12 +51,11 @@ class LoginScreen:
 
             # If logged in, check start button
             if self.current_user_id:
-                start_button = Button(SCREEN_WIDTH // 2 - 100, 350, 200, 50, "Start Game", GREEN)
-                if start_button.handle_event(event):
+                if self.start_button.handle_event(event):
                     return "start_game"
 
-            # Input boxes (only when not logged in)
-            if not self.current_user_id:
+            # Input boxes (only when not logged in and not busy checking credentials)
+            if not self.current_user_id and not self.auth_pending:
                 if self.username_input.handle_event(event):
                     self.password_input.active = True
                     self.password_input.color = BLUE
@@ -62,6 +70,9 @@ class LoginScreen:
                 if self.register_button.handle_event(event):
                     self.attempt_register()
 
+            if self.leaderboard_button.handle_event(event):
+                return "leaderboard"
+
             if self.exit_button.handle_event(event):
                 self.running = False
                 return "quit"
@@ -77,36 +88,74 @@ class LoginScreen:
             self.message_box.show("Please fill in all fields", RED)
             return
         
-        user_id = self.db.login_user(username, password)
-        
-        if user_id:
-            self.current_user_id = user_id
-            self.current_username = username
-            self.message_box.show("Login successful!", GREEN)
-        else:
-            self.message_box.show("Invalid credentials", RED)
-            self.password_input.clear()
+        self.start_auth("login", username, password)
+        self.message_box.show("Logging in...", BLACK)
     
     def attempt_register(self):
         """Try to register a new user"""
         username = self.username_input.get_text()
         password = self.password_input.get_text()
         
-        success, message = self.db.register_user(username, password)
+        self.start_auth("register", username, password)
+        self.message_box.show("Registering...", BLACK)
+    
+    def start_auth(self, action, username, password):
+        """Check credentials on a worker thread; password hashing is slow on purpose"""
+        self.auth_pending = True
+        thread = threading.Thread(target=self.run_auth, args=(action, username, password), daemon=True)
+        thread.start()
+    
+    def run_auth(self, action, username, password):
+        """Worker thread: log in or register, then hand the result to the screen
+        (always, or the screen would wait on its spinner forever)"""
+        result = None if action == "login" else (False, "Could not register, try again")
+        try:
+            if action == "login":
+                result = self.db.login_user(username, password)
+            else:
+                result = self.db.register_user(username, password)
+        except sqlite3.Error as e:
+            print(f"Could not {action}: {e}")
+            if action == "register":
+                result = (False, "Database error, try again")
+        except Exception as e:
+            print(f"Could not {action}: {e}")
+        finally:
+            self.auth_result = (action, username, result)
+    
+    def finish_auth(self):
+        """Apply a finished login or registration (called every frame)"""
+        if self.auth_result is None:
+            return
+        
+        action, username, result = self.auth_result
+        self.auth_result = None
+        self.auth_pending = False
         
-        if success:
-            self.message_box.show(message, GREEN)
-            self.username_input.clear()
-            self.password_input.clear()
+        if action == "login":
+            if result:
+                self.current_user_id = result
+                self.current_username = username
+                self.stats.watch(result)  # Fetch this player's stats in the background
+                self.message_box.show("Login successful!", GREEN)
+            else:
+                self.message_box.show("Invalid credentials", RED)
+                self.password_input.clear()
         else:
-            self.message_box.show(message, RED)
+            success, message = result
+            if success:
+                self.message_box.show(message, GREEN)
+                self.username_input.clear()
+                self.password_input.clear()
+            else:
+                self.message_box.show(message, RED)
     
     def draw(self):
         """Draw the login screen"""
         self.screen.fill(WHITE)
         
         # Title
-        title = self.title_font.render("Platform Game", True, BLUE)
+        title = render_text(self.title_font, "Platform Game", BLUE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
         self.screen.blit(title, title_rect)
         
@@ -123,36 +172,54 @@ class LoginScreen:
             self.register_button.draw(self.screen, self.font)
         
         self.exit_button.draw(self.screen, self.font)
+        self.leaderboard_button.draw(self.screen, self.small_font)
         
         # Message box
         self.message_box.update()
         self.message_box.draw(self.screen, self.small_font)
+        
+        if self.auth_pending:
+            self.draw_spinner(SCREEN_WIDTH // 2, 575)
+    
+    def draw_spinner(self, x, y, radius=12):
+        """Draw a rotating arc while credentials are being checked"""
+        angle = pygame.time.get_ticks() / 150
+        rect = pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
+        pygame.draw.arc(self.screen, BLUE, rect, angle, angle + math.pi * 1.5, 3)
     
     def draw_user_info(self):
         """Draw user information and high scores"""
         center_x = SCREEN_WIDTH // 2
 
         # Welcome message
-        welcome = self.font.render(f"Welcome, {self.current_username}!", True, BLACK)
+        welcome = render_text(self.font, f"Welcome, {self.current_username}!", BLACK)
         welcome_rect = welcome.get_rect(center=(center_x, 200))
         self.screen.blit(welcome, welcome_rect)
 
+        # Stats come from the cache; refreshes happen in the background
+        self.stats.refresh_if_stale()
+
         # User high score
-        user_high = self.db.get_user_high_score(self.current_user_id)
-        user_score_text = self.small_font.render(f"Your High Score: {user_high}", True, BLACK)
+        user_high = self.stats.get_user_best(self.current_user_id)
+        if user_high is None:
+            user_high = "..."
+        user_score_text = render_text(self.small_font, f"Your High Score: {user_high}", BLACK)
         user_score_rect = user_score_text.get_rect(center=(center_x, 250))
         self.screen.blit(user_score_text, user_score_rect)
 
         # Global high score
-        global_high, top_player = self.db.get_global_high_score()
-        global_text = self.small_font.render(f"Global High Score: {global_high} by {top_player}", True, BLACK)
+        global_best = self.stats.get_global_best()
+        if global_best:
+            global_high, top_player = global_best
+            global_text = render_text(self.small_font, f"Global High Score: {global_high} by {top_player}", BLACK)
+        else:
+            global_text = render_text(self.small_font, "Global High Score: ...", BLACK)
         global_rect = global_text.get_rect(center=(center_x, 290))
         self.screen.blit(global_text, global_rect)
 
         # Start button
-        start_button = Button(center_x - 100, 350, 200, 50, "Start Game", GREEN)
-        start_button.is_hovered = start_button.rect.collidepoint(pygame.mouse.get_pos())
-        start_button.draw(self.screen, self.font)
+        self.start_button.is_hovered = self.start_button.rect.collidepoint(pygame.mouse.get_pos())
+        self.start_button.draw(self.screen, self.font)
     
     def run(self):
         """Main login screen loop"""
@@ -164,11 +231,16 @@ class LoginScreen:
 
             # Handle events
             result = self.handle_events(events)
+            self.finish_auth()
 
             if result == "quit":
                 return None, None
             elif result == "start_game":
                 return self.current_user_id, self.current_username
+            elif result == "leaderboard":
+                if LeaderboardScreen(self.screen, self.current_user_id).run() == "quit":
+                    return None, None
+                continue
 
             self.draw()
 
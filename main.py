@@ -7,6 +7,7 @@ from config import *
 from login import LoginScreen
 from game import Game
 from assets import init_assets
+from database import close_pools, close_score_writer, latency_report
 
 
 def main():
@@ -40,6 +41,12 @@ def main():
         
         # After game ends, return to login screen
     
+    # Make sure every queued score reaches the database before exiting
+    close_score_writer()
+    if DB_LOG_LATENCY:
+        for line in latency_report():
+            print(line)
+    close_pools()
     pygame.quit()
     sys.exit()
 
@@ -4,6 +4,7 @@ Player class with movement, jumping, and collision detection
 import pygame
 from config import *
 from assets import get_assets
+from collision import SpatialHash, TileGrid
 
 
 class Player(pygame.sprite.Sprite):
@@ -13,6 +14,7 @@ class Player(pygame.sprite.Sprite):
         # Load player animations from asset manager
         assets = get_assets()
         self.animations = {}
+        self.flipped_animations = {}
         self.has_animations = False
 
         if assets:
@@ -22,11 +24,18 @@ class Player(pygame.sprite.Sprite):
             jump_frames = assets.get_sprite('player_jump')
 
             if idle_frames and isinstance(idle_frames, list):
-                self.animations['idle'] = idle_frames
-                self.animations['walk'] = walk_frames if walk_frames else idle_frames
-                self.animations['jump'] = jump_frames if jump_frames else idle_frames
+                # Use pre-scaled frames from the asset cache (both facings)
+                size = (PLAYER_WIDTH, PLAYER_HEIGHT)
+                sources = {
+                    'idle': 'player_idle',
+                    'walk': 'player_walk' if walk_frames else 'player_idle',
+                    'jump': 'player_jump' if jump_frames else 'player_idle'
+                }
+                for anim_name, sprite_name in sources.items():
+                    self.animations[anim_name] = assets.get_frames(sprite_name, size)
+                    self.flipped_animations[anim_name] = assets.get_frames(sprite_name, size, flipped=True)
                 self.has_animations = True
-                self.image = pygame.transform.scale(idle_frames[0], (PLAYER_WIDTH, PLAYER_HEIGHT))
+                self.image = self.animations['idle'][0]
             else:
                 # Try single sprite
                 sprite = assets.get_sprite('player')
@@ -58,7 +67,11 @@ class Player(pygame.sprite.Sprite):
         self.facing_right = True
     
     def update(self, platforms):
-        """Update player position and handle physics"""
+        """Update player position and handle physics.
+
+        platforms is a list, a SpatialHash of them, or a TileGrid of solid map tiles;
+        for the last two only nearby platforms or tiles are tested
+        """
         # Handle invincibility timer
         if self.invincible:
             self.invincible_timer -= 1
@@ -71,13 +84,15 @@ class Player(pygame.sprite.Sprite):
             self.vel_y = MAX_FALL_SPEED
         
         # Horizontal movement
+        previous = self.rect.copy()
         self.rect.x += self.vel_x
-        self.check_collision_x(platforms)
+        self.check_collision_x(self.nearby_platforms(platforms, previous))
         
         # Vertical movement
+        previous = self.rect.copy()
         self.rect.y += self.vel_y
         self.on_ground = False
-        self.check_collision_y(platforms)
+        self.check_collision_y(self.nearby_platforms(platforms, previous))
         
         # Keep player on screen
         if self.rect.left < 0:
@@ -88,6 +103,28 @@ class Player(pygame.sprite.Sprite):
         # Update animation
         self.update_animation()
     
+    def nearby_platforms(self, platforms, previous):
+        """Platforms that can touch the player on its way from previous to its current
+        rect, in list order. Collisions only push the player back along its path, unless
+        it started inside a platform; if a push leaves the searched area, search again."""
+        if not isinstance(platforms, (SpatialHash, TileGrid)):
+            yield from platforms
+            return
+
+        area = self.rect.union(previous)
+        last = -1
+        while True:
+            for index in platforms.query_indices(area):
+                if index <= last:
+                    continue
+                yield platforms[index]
+                last = index
+                if not area.contains(self.rect):
+                    break
+            else:
+                return
+            area = area.union(self.rect)
+    
     def check_collision_x(self, platforms):
         """Check for horizontal collisions with platforms"""
         for platform in platforms:
@@ -162,20 +199,20 @@ class Player(pygame.sprite.Sprite):
             self.animation_counter = 0
             self.animation_frame = (self.animation_frame + 1) % len(self.animations[self.current_animation])
 
-        # Get current frame and scale it
-        frames = self.animations[self.current_animation]
-        frame = frames[int(self.animation_frame)]
-        scaled_frame = pygame.transform.scale(frame, (PLAYER_WIDTH, PLAYER_HEIGHT))
-
-        # Flip if facing left
-        if not self.facing_right:
-            scaled_frame = pygame.transform.flip(scaled_frame, True, False)
+        # Pick the cached frame for the current facing (flipped if facing left)
+        if self.facing_right:
+            frames = self.animations[self.current_animation]
+        else:
+            frames = self.flipped_animations[self.current_animation]
+        self.image = frames[int(self.animation_frame)]
 
-        self.image = scaled_frame
+    def is_visible(self):
+        """Whether the player is shown this frame (flashes while invincible)"""
+        return not self.invincible or (self.invincible_timer % 10 < 5)
 
     def draw(self, screen):
         """Draw the player with invincibility flashing effect"""
-        if not self.invincible or (self.invincible_timer % 10 < 5):
+        if self.is_visible():
             screen.blit(self.image, self.rect)
     
     def reset_position(self, x, y):
@@ -0,0 +1,36 @@
+"""
+Dirty-rectangle renderer: redraws and presents only the parts of the screen that changed
+"""
+import pygame
+
+
+class DirtyRectRenderer:
+    """Restores last frame's sprite areas from the static background and
+    pushes only the changed regions to the display"""
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None  # Static surface the screen currently shows
+        self.previous_rects = []  # Areas drawn over the background last frame
+
+    def invalidate(self):
+        """Force a full repaint next frame (e.g. after a menu drew over the screen)"""
+        self.background = None
+
+    def restore(self, background):
+        """Erase last frame's sprites by copying the background back over them"""
+        if background is not self.background:
+            # New level or invalidated: repaint and present the whole screen once
+            self.background = background
+            self.screen.blit(background, (0, 0))
+            self.previous_rects = [self.screen.get_rect()]
+            return
+
+        for rect in self.previous_rects:
+            self.screen.blit(background, rect, rect)
+
+    def present(self, drawn_rects):
+        """Update the display where sprites were erased or drawn this frame"""
+        dirty = self.previous_rects + drawn_rects
+        self.previous_rects = drawn_rects
+        pygame.display.update(dirty)
@@ -0,0 +1,89 @@
+"""
+Headless simulation: plays the game without a window, as fast as the CPU allows
+
+Run `python simulate.py --games 20 --ticks 20000` to have a random player play
+whole games and report ticks per second and how each game ended, e.g. for
+balance testing. Add `--render-every 1` to also draw every frame off-screen and
+time drawing separately from the simulation.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# No window: must be set before pygame creates the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from config import *
+from assets import init_assets
+from game import Game
+
+
+class RandomInput:
+    """Input source that holds a random move (left, right or none, maybe jumping) for a few ticks"""
+
+    CHOICES = [(), ('left',), ('right',), ('jump',), ('left', 'jump'), ('right', 'jump')]
+
+    def __init__(self, seed, hold_ticks=15):
+        self.rng = random.Random(seed)
+        self.hold_ticks = hold_ticks
+        self.ticks = 0
+        self.actions = ()
+
+    def __call__(self, game):
+        if self.ticks % self.hold_ticks == 0:
+            self.actions = self.rng.choice(self.CHOICES)
+        self.ticks += 1
+        return self.actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play games headlessly with a random player")
+    parser.add_argument('--games', type=int, default=1, help="games to play, one seed each")
+    parser.add_argument('--ticks', type=int, default=SIMULATION_RATE * 300,
+                        help="stop a game after this many ticks (default: 5 minutes of play)")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the first game")
+    parser.add_argument('--render-every', type=int, default=0,
+                        help="draw every N ticks to an off-screen surface (0 = never)")
+    parser.add_argument('-o', '--output', help="write the per-game results as JSON to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))  # Images are converted to its format
+    init_assets()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) if args.render_every else None
+
+    results = []
+    start = time.perf_counter()
+    for seed in range(args.seed, args.seed + args.games):
+        random.seed(seed)  # Entities pick their looks with the random module
+        game = Game(screen, None, 'simulation', input_source=RandomInput(seed))
+        result = game.simulate(args.ticks, args.render_every)
+        result['seed'] = seed
+        results.append(result)
+
+        line = (f"seed {seed}: {result['result']} on level {result['level']}, score {result['score']}, "
+                f"{result['ticks']} ticks at {result['ticks_per_second']:.0f} ticks/s")
+        if result['frames']:
+            line += f", draw {result['draw_ms']:.2f} ms/frame"
+        print(line)
+
+    ticks = sum(result['ticks'] for result in results)
+    simulate_seconds = sum(result['simulate_seconds'] for result in results)
+    print(f"{len(results)} games, {ticks} ticks in {time.perf_counter() - start:.2f}s "
+          f"({ticks / simulate_seconds:.0f} ticks/s simulated, "
+          f"{ticks / simulate_seconds / SIMULATION_RATE:.0f}x real time)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Checks that the collision shortcuts resolve exactly like testing every platform in a list
+"""
+import random
+import pygame
+import pytest
+from config import *
+import level as level_module
+from collision import SpatialHash, TileGrid, merge_rects
+from entities import Platform
+from level import Level
+from player import Player
+
+
+def trajectory(platforms, seed, spawn=(100, SCREEN_HEIGHT - 150), steps=2000, teleport=None):
+    """Player states over a seeded random run; teleport(rng) picks occasional jump-to positions"""
+    rng = random.Random(seed)
+    player = Player(*spawn)
+    states = []
+    action = 0
+    for tick in range(steps):
+        if tick % 15 == 0:
+            action = rng.randint(0, 5)
+        if action in (0, 3):
+            player.move_left()
+        elif action in (1, 4):
+            player.move_right()
+        else:
+            player.stop()
+        if action >= 3:
+            player.jump()
+        if teleport and rng.random() < 0.01:
+            player.rect.topleft = teleport(rng)
+        player.update(platforms)
+        states.append((player.rect.topleft, player.vel_y, player.on_ground))
+    return states
+
+
+def teleport_anywhere(rng):
+    """Any position on (or just off) the screen, inside platforms included"""
+    return rng.randint(-60, SCREEN_WIDTH), rng.randint(-40, SCREEN_HEIGHT)
+
+
+def free_teleport(platforms):
+    """Teleports to random positions that don't overlap any platform (like every spawn)"""
+    rects = [platform.rect for platform in platforms]
+
+    def teleport(rng):
+        while True:
+            position = rng.randint(0, SCREEN_WIDTH - PLAYER_WIDTH), rng.randint(-40, SCREEN_HEIGHT)
+            if pygame.Rect(position, (PLAYER_WIDTH, PLAYER_HEIGHT)).collidelist(rects) < 0:
+                return position
+    return teleport
+
+
+def covered_points(rects, step=5):
+    """Sample points (on a grid finer than the rects' coordinates) covered by any rect"""
+    return {(x, y) for rect in rects
+            for x in range(rect.left, rect.right, step) for y in range(rect.top, rect.bottom, step)}
+
+
+def test_spatial_hash_query_keeps_list_order(display):
+    rng = random.Random(1)
+    platforms = [Platform(rng.randint(-100, 900), rng.randint(0, 700), rng.randint(0, 300)) for _ in range(200)]
+    grid = SpatialHash.from_platforms(platforms, cell_size=50)
+
+    for _ in range(500):
+        area = pygame.Rect(rng.randint(-100, 900), rng.randint(0, 700), rng.randint(0, 120), rng.randint(0, 120))
+        found = grid.query(area)
+        colliding = [platform for platform in platforms if platform.rect.colliderect(area)]
+        assert [platform for platform in found if platform.rect.colliderect(area)] == colliding
+        assert found == sorted(found, key=platforms.index)
+
+
+def test_spatial_hash_skips_empty_rects(display):
+    grid = SpatialHash.from_platforms([Platform(SCREEN_WIDTH, 0, 0)])
+    assert grid.cells == {}
+    assert grid.query(pygame.Rect(0, 0, 0, 10)) == []
+
+
+@pytest.mark.parametrize('level_number', [1, 2, 3])
+def test_spatial_hash_collisions_match_list(display, level_number):
+    level = Level(level_number)
+    platforms = level.platforms
+    if level.tiled_loader:
+        platforms = level.tiled_loader.load_platforms()
+    grid = SpatialHash.from_platforms(platforms)
+
+    for seed in range(5):
+        assert trajectory(grid, seed, teleport=teleport_anywhere) == \
+            trajectory(platforms, seed, teleport=teleport_anywhere)
+
+
+def test_merge_rects_keeps_the_solid_area():
+    rng = random.Random(2)
+    for _ in range(50):
+        rects = [pygame.Rect(rng.randint(0, 10) * 10, rng.randint(0, 10) * 10,
+                             rng.randint(0, 3) * 10, rng.randint(0, 3) * 10) for _ in range(40)]
+        merged = merge_rects(rects)
+
+        assert covered_points(rect for rect, _ in merged) == covered_points(rects)
+        assert all(rect.width and rect.height for rect, _ in merged)
+        # Every non-empty input ends up in exactly one merged rect
+        covered = sorted(index for _, indices in merged for index in indices)
+        assert covered == [index for index, rect in enumerate(rects) if rect.width and rect.height]
+
+
+def test_merge_rects_joins_stacks_and_runs():
+    column = [pygame.Rect(-55, y, 50, 20) for y in range(0, 600, 20)]
+    row = [pygame.Rect(x, 700, 32, 20) for x in range(0, 320, 32)]
+    merged = merge_rects(column + row + [pygame.Rect(800, 0, 0, 20)])
+    assert [rect for rect, _ in merged] == [pygame.Rect(-55, 0, 50, 600), pygame.Rect(0, 700, 320, 20)]
+
+
+@pytest.mark.parametrize('level_number', [1, 3])
+def test_merged_colliders_match_unmerged(display, monkeypatch, level_number):
+    """Merging is exact for every state reachable from a spawn. A player placed inside a
+    stack of rows (which the game never does) is pushed out row by row without merging."""
+    merged = Level(level_number)
+    monkeypatch.setattr(level_module, 'merge_platforms', lambda platforms: platforms)
+    unmerged = Level(level_number)
+    assert len(merged.platforms) <= len(unmerged.platforms)
+
+    # The spawn and respawn point is clear of every platform
+    spawn = Player(100, SCREEN_HEIGHT - 150).rect
+    assert spawn.collidelist([platform.rect for platform in unmerged.platforms]) < 0
+
+    teleport = free_teleport(unmerged.platforms)
+    for seed in range(5):
+        assert trajectory(merged.platform_grid, seed, teleport=teleport) == \
+            trajectory(unmerged.platforms, seed, teleport=teleport)
+
+    # One step from every free position, in every direction
+    rects = [platform.rect for platform in unmerged.platforms]
+    for x in range(-5, SCREEN_WIDTH - PLAYER_WIDTH + 5, 7):
+        for y in range(-40, SCREEN_HEIGHT, 7):
+            if pygame.Rect(x, y, PLAYER_WIDTH, PLAYER_HEIGHT).collidelist(rects) >= 0:
+                continue
+            for vel_x, vel_y in ((PLAYER_SPEED, 0), (-PLAYER_SPEED, 0), (0, MAX_FALL_SPEED), (0, -JUMP_STRENGTH)):
+                results = []
+                for platforms in (merged.platform_grid, unmerged.platforms):
+                    player = Player(0, 0)
+                    player.rect.topleft = (x, y)
+                    player.vel_x, player.vel_y = vel_x, vel_y - GRAVITY
+                    player.update(platforms)
+                    results.append((player.rect.topleft, player.vel_y, player.on_ground))
+                assert results[0] == results[1], (x, y, vel_x, vel_y)
+
+
+def test_tile_grid_runs_match_loader_platforms(display):
+    level = Level(2)
+    grid = level.platform_grid
+    assert isinstance(grid, TileGrid)
+    runs = level.tiled_loader.load_platforms()
+
+    everything = pygame.Rect(-100, -100, SCREEN_WIDTH + 200, SCREEN_HEIGHT + 200)
+    assert [grid[index].rect for index in grid.query_indices(everything)] == [run.rect for run in runs]
+    assert grid.query_indices(pygame.Rect(100, 100, 0, 50)) == []
+    assert grid.query_indices(pygame.Rect(-500, -500, 50, 50)) == []
+
+
+def test_tile_grid_collisions_match_platform_list(display):
+    """Exact even when the player starts inside a run, like level 2's spawn does"""
+    level = Level(2)
+    runs = level.tiled_loader.load_platforms()
+    spawn = Player(100, SCREEN_HEIGHT - 150).rect
+    assert spawn.collidelist([run.rect for run in runs]) >= 0
+
+    for seed in range(5):
+        assert trajectory(level.platform_grid, seed, teleport=teleport_anywhere) == \
+            trajectory(runs, seed, teleport=teleport_anywhere)
+
+    # One step from every position, inside runs included, in every direction
+    for x in range(-40, SCREEN_WIDTH, 6):
+        for y in range(-20, SCREEN_HEIGHT, 6):
+            for vel_x, vel_y in ((PLAYER_SPEED, 0), (-PLAYER_SPEED, 0), (0, MAX_FALL_SPEED), (0, -JUMP_STRENGTH)):
+                results = []
+                for platforms in (level.platform_grid, runs):
+                    player = Player(0, 0)
+                    player.rect.topleft = (x, y)
+                    player.vel_x, player.vel_y = vel_x, vel_y - GRAVITY
+                    player.update(platforms)
+                    results.append((player.rect.topleft, player.vel_y, player.on_ground))
+                assert results[0] == results[1], (x, y, vel_x, vel_y)
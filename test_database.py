@@ -0,0 +1,249 @@
+"""
+Checks that the faster database paths return what the plain queries would
+"""
+import glob
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import time
+import pytest
+import database
+from database import Database, ScoreWriter
+
+
+@pytest.fixture
+def db(tmp_path):
+    yield Database(str(tmp_path / "game_data.db"))
+    database.close_pools()
+
+
+def add_players(db, count, seed=1, max_score=50):
+    """count users with random scores; the small score range makes plenty of ties"""
+    with db.connection() as conn:
+        with conn:
+            conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')",
+                             [(f"player{i}",) for i in range(count)])
+    return add_scores(db, count, count * 3, seed, max_score)
+
+
+def add_scores(db, players, count, seed, max_score=50):
+    rng = random.Random(seed)
+    scores = [(rng.randint(1, players), rng.randint(0, max_score), rng.randint(1, 3)) for _ in range(count)]
+    db.save_batch(scores, [])
+    return scores
+
+
+def leaderboard(db):
+    """The whole leaderboard in one plain query, in page order"""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT b.user_id, u.username, b.score
+            FROM user_best b
+            JOIN users u ON b.user_id = u.id
+            ORDER BY b.score DESC, b.user_id
+        """).fetchall()
+
+
+def test_leaderboard_pages_walk_the_whole_board(db):
+    add_players(db, 300)
+    expected = leaderboard(db)
+    assert db.get_player_count() == len(expected)
+
+    forward = []
+    page = db.get_leaderboard_page(None, 17)
+    while page:
+        forward += page
+        page = db.get_leaderboard_page((page[-1][2], page[-1][0]), 17)
+    assert forward == expected
+
+    backward = []
+    page = db.get_leaderboard_page(None, 17, backwards=True)
+    while page:
+        backward = page + backward
+        page = db.get_leaderboard_page((page[0][2], page[0][0]), 17, backwards=True)
+    assert backward == expected
+
+
+def test_position_and_neighbours_match_the_board(db):
+    add_players(db, 120)
+    expected = leaderboard(db)
+    for position, (user_id, _, _) in enumerate(expected, 1):
+        assert db.get_user_position(user_id) == position
+        first, rows = db.get_users_around(user_id, 4)
+        assert first == max(1, position - 4)
+        assert rows == expected[first - 1:position + 4]
+
+    assert db.get_user_position(10 ** 6) is None
+    assert db.get_users_around(10 ** 6) == (None, [])
+
+
+def stored_password(db, username):
+    with db.connection() as conn:
+        return conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_legacy_password_is_upgraded_on_login(db):
+    legacy = hashlib.sha256(b"hunter22").hexdigest()
+    with db.connection() as conn:
+        with conn:
+            conn.execute("INSERT INTO users (username, password) VALUES ('old', ?)", (legacy,))
+
+    assert db.login_user('old', 'wrong') is None
+    assert stored_password(db, 'old') == legacy
+
+    user_id = db.login_user('old', 'hunter22')
+    assert user_id is not None
+    upgraded = stored_password(db, 'old')
+    assert not Database.needs_rehash(upgraded)
+    assert db.login_user('old', 'hunter22') == user_id
+    assert stored_password(db, 'old') == upgraded
+
+
+@pytest.mark.parametrize('stored', [
+    '', 'scrypt$', 'scrypt$x$8$1$00$00', 'scrypt$16384$8$1$zz$00', 'scrypt$3$8$1$00$00',
+    'scrypt$16384$8$99999999999999999999$00$00', 'pbkdf2_sha256$1$00', 'pbkdf2_sha256$-1$00$00',
+    'pbkdf2_sha256$1$nothex$00', 'md5$1$2$3',
+])
+def test_malformed_hashes_never_match(stored):
+    assert Database.verify_password('hunter22', stored) is False
+
+
+def test_compaction_keeps_leaderboards_and_totals(db):
+    old = add_players(db, 200, max_score=1000)
+    with db.connection() as conn:
+        with conn:
+            conn.execute("UPDATE scores SET achieved_at = datetime('now', '-' || (40 + id % 20) || ' days')")
+    add_scores(db, 200, 300, seed=2, max_score=1000)
+
+    def snapshot():
+        users = range(1, 201)
+        return (leaderboard(db), db.get_top_scores(50), db.get_global_high_score(),
+                [db.get_user_high_score(user) for user in users], [db.get_user_rank(user) for user in users],
+                [db.get_level_top_scores(level, 50) for level in (1, 2, 3)],
+                [db.get_level_high_score(user, level) for user in users for level in (1, 2, 3)])
+
+    before = snapshot()
+    result = db.compact_scores(30)
+    assert result['rows'] == len(old)
+    assert snapshot() == before
+    assert db.compact_scores(30)['rows'] == 0
+
+    expected = {}
+    for user_id, score, level in old:
+        best, games, total = expected.get((user_id, level), (0, 0, 0))
+        expected[(user_id, level)] = (max(best, score), games + 1, total + score)
+    with db.connection() as conn:
+        history = {(user_id, level): (best, games, total) for user_id, level, best, games, total
+                   in conn.execute("SELECT user_id, level, best, games, total FROM score_history")}
+        assert conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] == 300
+    assert history == expected
+
+
+def test_score_writer_spills_what_it_cannot_save_and_replays_it(db, monkeypatch):
+    add_players(db, 3)
+    scores = [(1, 500 + i, 1) for i in range(5)]
+
+    def broken(scores, sessions):
+        raise RuntimeError("disk is full")
+    monkeypatch.setattr(db, 'save_batch', broken)
+    writer = ScoreWriter(db, flush_interval=0.01)
+    for score in scores:
+        writer.submit_score(*score)
+    writer.submit_session(1, 504, 1, False, 3.5)
+    writer.close()
+    assert os.path.exists(writer.spill_path)
+    assert db.get_user_high_score(1) <= 50
+
+    # The next writer saves the spilled records first; the bad one is dropped, not retried forever
+    monkeypatch.undo()
+    writer = ScoreWriter(db, flush_interval=0.01)
+    writer.submit_score(None, 5, 2)
+    writer.submit_score(2, 600, 2)
+    writer.close()
+    assert not os.path.exists(writer.spill_path)
+    assert db.get_user_high_score(1) == 504
+    assert db.get_user_high_score(2) == 600
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+
+
+def write_spill_file(path, scores):
+    with open(path, 'a') as f:
+        for score in scores:
+            f.write(json.dumps(['score', score]) + "\n")
+
+
+def read_spill_file(path):
+    with open(path) as f:
+        return [tuple(record) for kind, record in map(json.loads, f)]
+
+
+def test_writers_sharing_a_spill_file_replay_each_record_once(db, monkeypatch):
+    add_players(db, 3)
+    save_batch = db.save_batch
+
+    def slow_save(scores, sessions):
+        time.sleep(0.02)  # Long enough for every writer to start its replay
+        save_batch(scores, sessions)
+    monkeypatch.setattr(db, 'save_batch', slow_save)
+    with db.connection() as conn:
+        saved = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+    spill_path = f"{db.db_name}-unsaved.jsonl"
+
+    for round in range(5):
+        scores = [(1 + i % 3, 1000 + round * 100 + i, 1) for i in range(50)]
+        write_spill_file(spill_path, scores)
+        writers = [ScoreWriter(db, flush_interval=0.01) for _ in range(4)]
+        for writer in writers:
+            writer.close()
+
+        with db.connection() as conn:
+            replayed = conn.execute("SELECT user_id, score, level FROM scores WHERE id > (SELECT MAX(id) - 50 FROM scores)"
+                                    ).fetchall()
+            assert conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] == saved + 50 * (round + 1)
+        assert sorted(replayed) == sorted(scores)
+        assert glob.glob(spill_path + "*") == []
+
+
+def test_records_spilled_during_a_replay_are_kept(db, monkeypatch):
+    add_players(db, 3)
+    spill_path = f"{db.db_name}-unsaved.jsonl"
+    write_spill_file(spill_path, [(1, 700, 1), (2, 701, 1)])
+    save_batch = db.save_batch
+
+    def save_while_another_process_spills(scores, sessions):
+        write_spill_file(spill_path, [(3, 702, 1)])
+        save_batch(scores, sessions)
+    monkeypatch.setattr(db, 'save_batch', save_while_another_process_spills)
+    ScoreWriter(db, flush_interval=0.01).close()
+
+    assert (db.get_user_high_score(1), db.get_user_high_score(2)) == (700, 701)
+    assert read_spill_file(spill_path) == [(3, 702, 1)]
+
+
+def test_a_failed_replay_keeps_only_the_uncommitted_records(db, monkeypatch):
+    add_players(db, 3)
+    spill_path = f"{db.db_name}-unsaved.jsonl"
+    write_spill_file(spill_path, [(1, 700, 1), (None, 5, 1), (2, 701, 1), (3, 702, 1)])
+    save_batch = db.save_batch
+
+    def lose_the_database_at_701(scores, sessions):
+        if len(scores) == 1 and scores[0][1] == 701:
+            raise sqlite3.OperationalError("disk I/O error")
+        save_batch(scores, sessions)
+    monkeypatch.setattr(db, 'save_batch', lose_the_database_at_701)
+    ScoreWriter(db, flush_interval=0.01).close()
+
+    # 700 was committed one by one after the bad record broke the batch; it isn't kept for another replay
+    assert db.get_user_high_score(1) == 700
+    assert read_spill_file(spill_path) == [(2, 701, 1), (3, 702, 1)]
+    assert glob.glob(spill_path + ".*") == []
+
+
+def test_a_saved_score_is_timed_once(db):
+    add_players(db, 1)
+    database.call_timings.clear()
+    db.save_score(1, 10, 1)
+    assert {name: len(samples) for name, samples in database.call_timings.items()} == {'save_batch': 1}
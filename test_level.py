@@ -0,0 +1,36 @@
+"""
+Checks the progress a level build reports to the loading screen
+"""
+import pytest
+from level import Level, LoadProgress
+
+
+def test_load_progress_spans_each_stage():
+    reports = []
+    progress = LoadProgress(reports.append, ['entities', 'grid', 'surface'])
+    progress.report('entities', 1, 4)
+    progress.report('entities', 4, 4)
+    progress.report('grid')
+    progress.report('surface', 0, 0)  # A stage with nothing to do counts as finished
+    shares = LoadProgress.STAGE_SHARES
+    total = shares['entities'] + shares['grid'] + shares['surface']
+    assert reports == pytest.approx([shares['entities'] / 4 / total, shares['entities'] / total,
+                                     (shares['entities'] + shares['grid']) / total, 1.0])
+
+
+@pytest.mark.parametrize('level_number', [1, 2, 3])
+def test_level_reports_steady_progress(display, level_number):
+    reports = []
+    Level(level_number, on_progress=reports.append)
+    assert reports == sorted(reports)
+    assert reports[-1] == pytest.approx(1.0)
+    assert all(0 < report <= 1 for report in reports)
+
+
+def test_tile_map_level_reports_every_object_and_layer(display):
+    reports = []
+    level = Level(2, on_progress=reports.append)
+    objects = len(level.enemies) + len(level.coins) + bool(level.chest) + bool(level.boss)
+    # Parse, each collision layer, each object, the grid, the background and each tile layer
+    assert len(set(reports)) >= 1 + objects + 2 + len(level.tiled_loader.background_layers())
+    assert max(b - a for a, b in zip(reports, reports[1:])) <= LoadProgress.STAGE_SHARES['map']
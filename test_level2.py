@@ -19,7 +19,9 @@ assets = get_assets()
 # Load level 2
 print("Loading level 2...")
 level = Level(2)
-print(f"Level 2 loaded! Platforms: {len(level.platforms)}")
+# Tile maps collide against their solid tile grid; build the platforms just to draw them
+platforms = level.platforms or (level.tiled_loader.load_platforms() if level.tiled_loader else [])
+print(f"Level 2 loaded! Platforms: {len(platforms)}")
 
 # Create player
 player = Player(100, 300)
@@ -39,7 +41,7 @@ while running:
     # Update
     keys = pygame.key.get_pressed()
     player.handle_input(keys)
-    player.update(level.platforms)
+    player.update(level.platform_grid)
 
     # Draw
     screen.fill((135, 206, 235))  # Sky blue background
@@ -50,7 +52,7 @@ while running:
         screen.blit(bg, (0, 0))
 
     # Draw platforms (debug - red boxes)
-    for platform in level.platforms:
+    for platform in platforms:
         pygame.draw.rect(screen, (255, 0, 0), platform.rect, 2)
 
     # Draw player
@@ -58,7 +60,7 @@ while running:
 
     # Draw info
     font = pygame.font.Font(None, 36)
-    info = font.render(f"Platforms: {len(level.platforms)} | Player: ({int(player.rect.x)}, {int(player.rect.y)})", True, (0, 0, 0))
+    info = font.render(f"Platforms: {len(platforms)} | Player: ({int(player.rect.x)}, {int(player.rect.y)})", True, (0, 0, 0))
     screen.blit(info, (10, 10))
 
     pygame.display.flip()
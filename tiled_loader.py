@@ -5,6 +5,7 @@ import pygame
 import pytmx
 from pytmx.util_pygame import load_pygame
 from entities import Platform, Enemy, Coin, Boss, Chest
+from collision import TileGrid
 from config import *
 
 
@@ -14,9 +15,14 @@ class TiledMapLoader:
         self.tmx_data = load_pygame(tmx_file)
         self.width = self.tmx_data.width * self.tmx_data.tilewidth
         self.height = self.tmx_data.height * self.tmx_data.tileheight
-
-    def load_level_data(self):
-        """Extract level data from the TMX file"""
+        # Solid tiles of the platform/collision layers, for direct tile collision
+        self.collision_grid = TileGrid(self.tmx_data.width, self.tmx_data.height,
+                                       self.tmx_data.tilewidth, self.tmx_data.tileheight)
+
+    def load_level_data(self, on_progress=None):
+        """Extract level data from the TMX file.
+        on_progress(stage, done, total) is called after each collision layer
+        ('colliders') and each object, with the sprites it loads ('entities')"""
         platforms = []
         enemies = pygame.sprite.Group()
         coins = pygame.sprite.Group()
@@ -24,14 +30,18 @@ class TiledMapLoader:
         chest = None
         player_spawn = None
 
-        # Load tile layers (platforms, background, etc)
-        for layer_idx, layer in enumerate(self.tmx_data.visible_layers):
-            if isinstance(layer, pytmx.TiledTileLayer):
-                # Check if this is a platform layer
-                if 'platform' in layer.name.lower() or 'collision' in layer.name.lower():
-                    platforms.extend(self.load_platforms_from_layer(layer_idx))
+        # Platform/collision layers only fill the solid tile grid: the player collides
+        # with it directly, so no platform sprites are built (see load_platforms)
+        collision_layers = self.collision_layer_indices()
+        for done, layer_idx in enumerate(collision_layers, 1):
+            self.load_solid_tiles(layer_idx)
+            if on_progress:
+                on_progress('colliders', done, len(collision_layers))
 
         # Load object layers (enemies, coins, player spawn, boss)
+        object_count = sum(len(layer) for layer in self.tmx_data.visible_layers
+                           if isinstance(layer, pytmx.TiledObjectGroup))
+        done = 0
         for layer in self.tmx_data.visible_layers:
             if isinstance(layer, pytmx.TiledObjectGroup):
                 for obj in layer:
@@ -73,6 +83,10 @@ class TiledMapLoader:
                     elif obj_type == 'chest':
                         chest = Chest(obj.x, obj.y)
 
+                    done += 1
+                    if on_progress:
+                        on_progress('entities', done, object_count)
+
         return {
             'platforms': platforms,
             'enemies': enemies,
@@ -82,6 +96,19 @@ class TiledMapLoader:
             'player_spawn': player_spawn
         }
 
+    def collision_layer_indices(self):
+        """Indices of the visible platform/collision tile layers"""
+        return [layer_idx for layer_idx, layer in enumerate(self.tmx_data.visible_layers)
+                if isinstance(layer, pytmx.TiledTileLayer)
+                and ('platform' in layer.name.lower() or 'collision' in layer.name.lower())]
+
+    def load_platforms(self):
+        """Platform objects for every collision layer (for debug drawing; not loaded with the level)"""
+        platforms = []
+        for layer_idx in self.collision_layer_indices():
+            platforms.extend(self.load_platforms_from_layer(layer_idx))
+        return platforms
+
     def load_platforms_from_layer(self, layer_idx):
         """Convert tile layer to platform objects"""
         platforms = []
@@ -119,34 +146,71 @@ class TiledMapLoader:
 
         return platforms
 
-    def render_background_layers(self, surface):
-        """Render non-collision tile layers as background"""
-        for layer in self.tmx_data.visible_layers:
-            if isinstance(layer, pytmx.TiledTileLayer):
-                # Skip platform/collision layers
-                if 'platform' in layer.name.lower() or 'collision' in layer.name.lower():
-                    continue
-
-                # Render background tiles
-                for x, y, image in layer.tiles():
-                    if image:
-                        surface.blit(image, (x * self.tmx_data.tilewidth, y * self.tmx_data.tileheight))
-
-
-def load_level_from_tiled(level_number):
-    """Load a level from a Tiled TMX file"""
+    def load_solid_tiles(self, layer_idx):
+        """Mark the layer's tiles as solid in the collision grid"""
+        for y in range(self.tmx_data.height):
+            for x in range(self.tmx_data.width):
+                if self.tmx_data.get_tile_image(x, y, layer_idx):
+                    self.collision_grid.set_solid(x, y)
+
+    def background_layers(self):
+        """The visible tile layers that aren't platform/collision layers, bottom first"""
+        return [layer for layer in self.tmx_data.visible_layers
+                if isinstance(layer, pytmx.TiledTileLayer)
+                and 'platform' not in layer.name.lower() and 'collision' not in layer.name.lower()]
+
+    def render_background_layers(self, surface, offset=(0, 0)):
+        """Render non-collision tile layers onto surface, honouring layer opacity"""
+        for layer in self.background_layers():
+            self.render_layer(surface, layer, offset)
+
+    def render_layer(self, surface, layer, offset=(0, 0)):
+        """Render one tile layer onto surface"""
+        offset_x, offset_y = offset
+        tile_width = self.tmx_data.tilewidth
+        tile_height = self.tmx_data.tileheight
+
+        # Draw translucent layers on their own surface so the opacity applies once
+        opacity = getattr(layer, 'opacity', 1.0)
+        if opacity < 1.0:
+            target = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+        else:
+            target = surface
+
+        # Render background tiles (taller tiles are bottom-aligned like in Tiled)
+        for x, y, image in layer.tiles():
+            if image:
+                target.blit(image, (x * tile_width + offset_x,
+                                    (y + 1) * tile_height - image.get_height() + offset_y))
+
+        if target is not surface:
+            target.set_alpha(round(opacity * 255))
+            surface.blit(target, (0, 0))
+
+
+def level_map_path(level_number):
+    """Path of a level's TMX file, or None if the level has no Tiled map"""
     import os
 
     tmx_file = os.path.join(os.path.dirname(__file__), 'assets', 'levels', f'level{level_number}.tmx')
+    return tmx_file if os.path.exists(tmx_file) else None
 
-    if not os.path.exists(tmx_file):
+
+def load_level_from_tiled(level_number, on_progress=None):
+    """Load a level from a Tiled TMX file.
+    on_progress(stage, done, total) reports the parse ('map') and then load_level_data's stages"""
+    tmx_file = level_map_path(level_number)
+
+    if not tmx_file:
         return None
 
     try:
         loader = TiledMapLoader(tmx_file)
-        level_data = loader.load_level_data()
+        if on_progress:
+            on_progress('map', 1, 1)
+        level_data = loader.load_level_data(on_progress)
         level_data['loader'] = loader  # Keep loader for background rendering
         return level_data
     except Exception as e:
         print(f"Error loading Tiled map: {e}")
-        return None
\ No newline at end of file
+        return None